@@ -57,9 +57,10 @@ class API(BaseAPI):
 
         # Middlewares which need be loaded.
         generic_middlewares = [
-            grapi_middleware.RequestId(),
             grapi_middleware.RequestBodyExtractor(),
+            grapi_middleware.Compression(),
             grapi_middleware.ResponseHeaders(),
+            grapi_middleware.ResponderTiming(),
         ]
 
         middleware = (middleware or []) + [
@@ -324,3 +325,17 @@ class API(BaseAPI):
             backend = self.import_backend(name)
             if hasattr(backend, 'initialize_error_handlers'):
                 backend.initialize_error_handlers(self)
+
+    def backends_stats(self):
+        """Call 'stats' for all backends and sum up their counters.
+
+        Returns:
+            Dict: counters by name.
+        """
+        result = {}
+        for name in self.backends:
+            backend = self.import_backend(name)
+            if hasattr(backend, 'stats'):
+                for key, value in backend.stats().items():
+                    result[key] = result.get(key, 0) + value
+        return result
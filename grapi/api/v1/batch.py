@@ -166,6 +166,9 @@ class BatchResource(Resource):
             custom_headers = request.get("headers", {})
             # dict merging has right-to-left priority
             headers = {**custom_headers, **req.headers}
+            # Responses are embedded in the batch response, which is
+            # compressed as a whole, and must be complete.
+            headers = {k: v for k, v in headers.items() if k.lower() not in ("accept-encoding", "if-none-match")}
 
             # URL and query string.
             parsed_url = urlparse(request.get("url", ""))
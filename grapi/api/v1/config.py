@@ -3,6 +3,20 @@ import os
 
 PREFIX = '/api/gc/v1'
 
+# Indent JSON responses, instead of sending compact JSON.
+JSON_PRETTY = bool(int(
+    os.getenv("GRAPI_JSON_PRETTY", "0")
+))
+
+# Streamed responses are sent in buffers of this many bytes (0 sends each
+# chunk as produced), or what was produced within the flush interval seconds.
+STREAM_BUFFER_SIZE = int(
+    os.getenv("GRAPI_STREAM_BUFFER_SIZE", "32768")
+)
+STREAM_FLUSH_INTERVAL = float(
+    os.getenv("GRAPI_STREAM_FLUSH_INTERVAL", "0.2")
+)
+
 SUBSCRIPTION_NOTIFY_TIMEOUT = int(
     os.getenv("GRAPI_SUBSCRIPTION_NOTIFY_TIMEOUT", "10")
 )
@@ -34,3 +48,13 @@ SUBSCRIPTION_REQUEST_MAX_REDIRECT = int(
 SUBSCRIPTION_REQUEST_SESSION_PREFIX = os.getenv(
     "GRAPI_SUBSCRIPTION_REQUEST_SESSION_PREFIX", "https://"
 )
+
+# Compression level (1-9) of responses for clients accepting gzip or deflate
+# encoding, 0 disables compression.
+COMPRESSION_LEVEL = int(
+    os.getenv("GRAPI_COMPRESSION_LEVEL", "6")
+)
+# Responses smaller than this (in bytes) are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(
+    os.getenv("GRAPI_COMPRESSION_MIN_SIZE", "1024")
+)
@@ -1,12 +1,14 @@
 """Middlewares package."""
+from .compression import Compression
 from .request_body_extractor import RequestBodyExtractor
-from .request_id import RequestId
 from .resource_patcher import ResourcePatcher
+from .responder_timing import ResponderTiming
 from .response_headers import ResponseHeaders
 
 __all__ = (
-    "RequestId",
+    "Compression",
     "RequestBodyExtractor",
     "ResourcePatcher",
+    "ResponderTiming",
     "ResponseHeaders"
 )
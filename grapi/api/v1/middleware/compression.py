@@ -0,0 +1,129 @@
+"""Response compression middleware."""
+import functools
+import zlib
+
+import falcon
+
+from grapi.api.v1.config import COMPRESSION_LEVEL, COMPRESSION_MIN_SIZE
+
+# Window bits of zlib.compressobj per content coding.
+_encodings = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+_compressible_types = ("application/json", "text/")
+
+
+@functools.lru_cache(maxsize=64)
+def accepted_encoding(header):
+    """Select content coding of response based on Accept-Encoding header.
+
+    Args:
+        header (str): Accept-Encoding header value.
+
+    Returns:
+        Optional[str]: "gzip", "deflate" or None when neither is accepted.
+    """
+    accepted = {}
+    for item in header.lower().split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in ("gzip", "deflate"):
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compressed_stream(stream, compressor):
+    """Compress response stream while it is being sent.
+
+    Each chunk is flushed, so clients get data as soon as it is produced.
+    Chunks of list responses are already coalesced into larger buffers.
+
+    Args:
+        stream (Iterable[bytes]): chunks.
+        compressor (zlib.Compress): compressor object.
+
+    Yields:
+        bytes: compressed data.
+    """
+    try:
+        for chunk in stream:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+class Compression:
+    """Compress responses with gzip or deflate as accepted by the client.
+
+    Response bodies are compressed at once, and sent uncompressed when they
+    are smaller than min_size. Streams are always compressed while they are
+    being sent, as their size is not known before the headers are sent.
+    """
+
+    def __init__(self, level=COMPRESSION_LEVEL, min_size=COMPRESSION_MIN_SIZE):
+        self.level = level
+        self.min_size = min_size
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        """Built-in Falcon middleware method."""
+        if not self.level:
+            return
+
+        if resp.status in (falcon.HTTP_204, falcon.HTTP_304) or req.method == "HEAD":
+            return
+
+        if not (resp.content_type or "").startswith(_compressible_types):
+            return
+
+        if resp.get_header("Content-Encoding"):
+            return
+
+        resp.append_header("Vary", "Accept-Encoding")
+
+        header = req.get_header("Accept-Encoding")
+        encoding = accepted_encoding(header) if header else None
+        if encoding is None:
+            return
+
+        body = resp.body
+        if body is None:
+            body = resp.data
+
+        if body is not None:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            if len(body) < self.min_size:
+                return
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, _encodings[encoding])
+            resp.body = None
+            resp.data = compressor.compress(body) + compressor.flush()
+
+        elif resp.stream is not None and not hasattr(resp.stream, "read"):
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, _encodings[encoding])
+            resp.stream = compressed_stream(resp.stream, compressor)
+            resp.stream_len = None
+
+        else:
+            return
+
+        resp.set_header("Content-Encoding", encoding)
@@ -7,8 +7,8 @@ from MAPI.Struct import MAPIErrorInvalidEntryid
 
 from grapi.api.common import API
 from grapi.api.v1.api_resource import BackendResource
-from grapi.api.v1.prefer import Prefer
 from grapi.api.v1.timezone import to_timezone
+from grapi.api.v1.timing import span
 
 
 class ResourcePatcher:
@@ -19,15 +19,35 @@ class ResourcePatcher:
         self.default_backend = default_backend
         self.options = options
 
+        # Resources are created once per class and shared by all requests,
+        # thus they must not keep request state.
+        self.resources = {}
+        self.utils = None
+
+    def get_resource(self, resource_cls):
+        """Return the shared instance of a resource class.
+
+        Args:
+            resource_cls (type): backend resource class.
+
+        Returns:
+            Resource: resource instance.
+        """
+        resource = self.resources.get(resource_cls)
+        if resource is None:
+            # When created concurrently, all requests use the first one stored.
+            resource = self.resources.setdefault(resource_cls, resource_cls(self.options))
+        return resource
+
     def process_resource(self, req, resp, resource, params):
         """Built-in Falcon middleware method."""
         if not isinstance(resource, BackendResource):
             return
 
-        prefer = req.context.prefer = Prefer(req)
-
-        # Common request validaton.
-        prefer_time_zone = prefer.get('outlook.timezone', raw=True)
+        # Common request validaton. Without header, Prefer is created by the
+        # request context when used.
+        prefer = req.context.prefer if req.get_header('Prefer') else None
+        prefer_time_zone = prefer.get('outlook.timezone', raw=True) if prefer else None
         if prefer_time_zone:
             try:
                 prefer_tzinfo = to_timezone(prefer_time_zone)
@@ -58,11 +78,14 @@ class ResourcePatcher:
 
         # Add server store object for the user to the resource instance.
         if hasattr(resource_cls, "need_store") and resource_cls.need_store:
-            backend_name = next(iter(self.name_backend))
-            utils = API.import_backend("{}.utils".format(backend_name))
+            utils = self.utils
+            if utils is None:
+                backend_name = next(iter(self.name_backend))
+                utils = self.utils = API.import_backend("{}.utils".format(backend_name))
             userid = params.pop('userid') if 'userid' in params else None
             try:
-                server, store, userid, userstore = utils._server_store(req, userid, self.options)
+                with span(req, 'session'):
+                    server, store, userid, userstore = utils._server_store(req, userid, self.options)
             except MAPIErrorInvalidEntryid:
                 raise falcon.HTTPBadRequest("Invalid entryid provided")
             # User should have store.
@@ -76,4 +99,4 @@ class ResourcePatcher:
             req.context.user_store = userstore
 
         # result: eg ldap.UserResource() or kopano.MessageResource()
-        req.context.resource = resource_cls(self.options)
+        req.context.resource = self.get_resource(resource_cls)
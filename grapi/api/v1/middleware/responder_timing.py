@@ -0,0 +1,22 @@
+"""Responder timing middleware."""
+import time
+
+
+class ResponderTiming:
+    """Time the responder of timed requests.
+
+    Must be the last middleware, so its process_resource is called right
+    before and its process_response right after the responder.
+    """
+
+    def process_resource(self, req, resp, resource, params):
+        """Built-in Falcon middleware method."""
+        timing = req.context.get('timing')
+        if timing is not None:
+            req.context.responder_start = time.perf_counter()
+
+    def process_response(self, req, resp, resource, req_succeeded):
+        """Built-in Falcon middleware method."""
+        start = req.context.get('responder_start')
+        if start is not None:
+            req.context.timing.add('responder', time.perf_counter() - start)
@@ -1,13 +1,15 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
-from .utils import _header_args
+from .utils import _parse_header_args
 
 _marker = {}
 
 
 class Prefer:
     def __init__(self, req):
-        self._prefer = _header_args(req, 'Prefer')
+        # Shared by requests with the same header, only read here.
+        header = req.get_header('Prefer')
+        self._prefer = _parse_header_args(header) if header else {}
         self._parsed = {}
         self._applied = {}
 
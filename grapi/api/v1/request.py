@@ -1,11 +1,53 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
+import uuid
+import weakref
+
 import falcon
 
+from .prefer import Prefer
+from .resource import _validate_qs
+
 if falcon.__version__.startswith("1."):
     from .context import Context
 else:
     from falcon import Context
 
 
+class RequestContext(Context):
+    """Request context which creates some of its attributes on first access.
+
+    Attributes:
+        request_id (str): unique ID of the request.
+        prefer (Prefer): parsed Prefer header of the request.
+        query_args (Dict): parsed and validated query string of the request.
+        memo (Dict): values which backends look up once per request.
+        render_failed (bool): whether rendering the response skipped items.
+    """
+
+    _factories = {
+        'request_id': lambda req: str(uuid.uuid4()),
+        'prefer': Prefer,
+        'query_args': lambda req: _validate_qs(req.query_string),
+        'memo': lambda req: {},
+        'render_failed': lambda req: False,
+    }
+
+    def __getattr__(self, name):
+        # Only called for attributes which are not set yet.
+        factory = self._factories.get(name)
+        if factory is None:
+            raise AttributeError(name)
+        ref = self.__dict__.get('_request')
+        if ref is None:
+            raise AttributeError(name)
+        value = self.__dict__[name] = factory(ref())
+        return value
+
+
 class Request(falcon.request.Request):
-    context_type = Context
+    context_type = RequestContext
+
+    def __init__(self, env, options=None):
+        super().__init__(env, options)
+        # Weak, so the request and its context do not form a cycle.
+        self.context.__dict__['_request'] = weakref.ref(self)
@@ -1,11 +1,15 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
+import hashlib
 import html
+import time
 from urllib.parse import parse_qs, quote, urlencode
 
 import falcon
 from jsonschema import ValidationError
 
+from .config import JSON_PRETTY, STREAM_BUFFER_SIZE, STREAM_FLUSH_INTERVAL
+
 try:
     import ujson as json
     UJSON = True
@@ -20,8 +24,8 @@ except TypeError:  # pragma: no cover
     INDENT = False
 
 
-def _parse_qs(req):
-    args = parse_qs(req.query_string)
+def _validate_qs(query_string):
+    args = parse_qs(query_string)
     for arg, values in args.items():
         if len(values) > 1:
             raise HTTPBadRequest("Query option '%s' was specified more than once, but it must be specified at most once." % arg)
@@ -35,6 +39,26 @@ def _parse_qs(req):
     return args
 
 
+def _parse_qs(req):
+    # The query string is parsed once per request, callers get a copy as
+    # some of them modify the arguments.
+    try:
+        args = req.context.query_args
+    except AttributeError:
+        args = _validate_qs(req.query_string)
+    return {arg: list(values) for arg, values in args.items()}
+
+
+def _etag(req, key):
+    # Weak, as representations differ in whitespace with compression and
+    # JSON formatting. The query string and Prefer header select different
+    # representations of the same state.
+    variant = req.query_string + '\0' + (req.get_header('Prefer') or '')
+    if variant != '\0':
+        key += '-' + hashlib.sha1(variant.encode('utf-8')).hexdigest()[:16]
+    return 'W/"%s"' % key
+
+
 def _encode_qs(query):
     return urlencode(query, doseq=True, encoding='utf-8', safe='$', quote_via=quote)
 
@@ -44,10 +68,12 @@ def _loadb_json(b, *args, **kwargs):
 
 
 def _dumpb_json(obj, *args, **kwargs):
-    if INDENT:
+    if JSON_PRETTY and INDENT:
         kwargs.setdefault('indent', 2)
     else:
         kwargs.pop('indent', None)
+        if not UJSON:
+            kwargs.setdefault('separators', (',', ':'))
     if UJSON:
         kwargs.setdefault('escape_forward_slashes', False)
     kwargs.setdefault('ensure_ascii', False)
@@ -55,6 +81,33 @@ def _dumpb_json(obj, *args, **kwargs):
     return json.dumps(obj, *args, **kwargs).encode('utf-8')
 
 
+def _coalesce(chunks, size=STREAM_BUFFER_SIZE, interval=STREAM_FLUSH_INTERVAL):
+    # Joins small chunks of a response stream, so they are not written one
+    # by one. A buffer is sent once it has size bytes, or when a chunk comes
+    # in interval seconds after the last one was sent.
+    if not size:
+        yield from chunks
+        return
+    buffer = []
+    buffered = 0
+    flushed = time.monotonic()
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= size or time.monotonic() - flushed >= interval:
+                yield b''.join(buffer)
+                buffer = []
+                buffered = 0
+                flushed = time.monotonic()
+        if buffer:
+            yield b''.join(buffer)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
 class HTTPBadRequest(falcon.HTTPBadRequest):
     def __init__(self, msg):
         msg = html.escape(msg)
@@ -79,6 +132,30 @@ class Resource:
         resp.set_header('Content-Length', '0')  # https://github.com/jonashaag/bjoern/issues/139
         resp.status = falcon.HTTP_204
 
+    def respond_304(self, req, resp, etag):
+        """Set ETag of the response and end the request with 304 Not Modified
+        if it matches If-None-Match of the request.
+
+        Args:
+            req (Request): Falcon request object.
+            resp (Response): Falcon response object.
+            etag (str): entity tag of the response.
+
+        Raises:
+            falcon.HTTPStatus: 304 when the client has the response already.
+        """
+        resp.set_header('ETag', etag)
+        resp.append_header('Vary', 'Prefer')
+        if_none_match = req.get_header('If-None-Match')
+        if not if_none_match or req.method not in ('GET', 'HEAD'):
+            return
+        # Weak comparison, see RFC 7232 section 3.2.
+        opaque = etag[2:] if etag.startswith('W/') else etag
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*' or (tag[2:] if tag.startswith('W/') else tag) == opaque:
+                raise falcon.HTTPStatus(falcon.HTTP_304, headers={'ETag': etag})
+
     @staticmethod
     def load_json(req):
         try:
@@ -95,4 +172,4 @@ class Resource:
     def respond_json(self, resp, data):
         resp.content_type = 'application/json'
         resp.status = falcon.HTTP_200
-        resp.body = json.dumps(data, indent=2)
+        resp.body = _dumpb_json(data)
@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
+import functools
+
 import pytz
 
 # Based on https://github.com/unicode-org/cldr/blob/master/common/supplemental/windowsZones.xml rebuild
@@ -143,6 +145,7 @@ _windows_to_iana = {
 }
 
 
+@functools.lru_cache(maxsize=256)
 def to_timezone(tz):
     # Apply translations, to increate time zone name compatibility.
     tz = _windows_to_iana.get(tz, tz)
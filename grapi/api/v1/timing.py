@@ -0,0 +1,44 @@
+"""Request phase timing."""
+import time
+from contextlib import contextmanager
+
+
+class Timing:
+    """Durations of the phases of a request.
+
+    A request is timed when a timing object is set as `timing` in its
+    context. Phases recorded more than once are summed up.
+    """
+
+    def __init__(self):
+        """Built-in Python method."""
+        self.start = time.perf_counter()
+        self.phases = {}
+
+    def add(self, phase, duration):
+        """Add duration to a phase.
+
+        Args:
+            phase (str): phase name.
+            duration (float): duration in seconds.
+        """
+        self.phases[phase] = self.phases.get(phase, 0) + duration
+
+
+@contextmanager
+def span(req, phase):
+    """Time the enclosed block as a phase of the request.
+
+    Args:
+        req (Request): Falcon request object.
+        phase (str): phase name.
+    """
+    timing = req.context.get('timing')
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(phase, time.perf_counter() - start)
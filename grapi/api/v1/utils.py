@@ -1,17 +1,27 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
+import functools
+
 from falcon import HTTPNotFound
 
 from .resource import Resource
 
 
-def _header_args(req, name):  # TODO use urlparse.parse_qs or similar..?
+@functools.lru_cache(maxsize=256)
+def _parse_header_args(header):  # TODO use urlparse.parse_qs or similar..?
+    # Clients send the same few header values, so they are parsed once.
     d = {}
+    for arg in header.split(';'):
+        k, v = arg.split('=')
+        d[k] = v
+    return d
+
+
+def _header_args(req, name):
     header = req.get_header(name)
     if header:
-        for arg in header.split(';'):
-            k, v = arg.split('=')
-            d[k] = v
-    return d
+        # Copied, as the parsed values are shared.
+        return dict(_parse_header_args(header))
+    return {}
 
 
 def _header_sub_arg(req, name, arg):
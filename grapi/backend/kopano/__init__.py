@@ -56,3 +56,21 @@ def initialize_error_handlers(api):
     """Initialize MAPI Error Handlers"""
     api.add_error_handler(MAPIErrorNoAccess, no_access_error_handler)
     api.add_error_handler(MAPIErrorStoreFull, store_full_error_handler)
+
+
+def stats():
+    '''Backend stats function, returns the sizes of the session caches and
+       the number of active subscriptions of this process.'''
+    from . import subscription, utils
+
+    with utils.threadLock:
+        token_sessions = len(utils.TOKEN_SESSION)
+        passthrough_sessions = len(utils.PASSTHROUGH_SESSION)
+    with subscription.thread_lock:
+        subscriptions = sum(len(record.subscriptions) for record in subscription.RECORDS.values())
+
+    return {
+        'token_sessions': token_sessions,
+        'passthrough_sessions': passthrough_sessions,
+        'subscriptions': subscriptions,
+    }
@@ -0,0 +1,148 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+import collections
+import logging
+import os
+import threading
+import time
+import weakref
+
+import kopano
+
+# Number of rendered directory responses kept per company, 0 disables.
+DIRECTORY_CACHE_SIZE = int(os.getenv('GRAPI_DIRECTORY_CACHE_SIZE', '256'))
+# Seconds between checks of the GAB sync state of a company.
+DIRECTORY_CACHE_CHECK_INTERVAL = float(os.getenv('GRAPI_DIRECTORY_CACHE_CHECK_INTERVAL', '2'))
+# Characters of rendered item bodies kept per worker, 0 disables.
+BODY_CACHE_SIZE = int(os.getenv('GRAPI_BODY_CACHE_SIZE', str(32 * 1024 * 1024)))
+
+
+class _GABChanges:
+    def __init__(self):
+        self.changed = False
+
+    def update(self, user):
+        self.changed = True
+
+    def delete(self, user):
+        self.changed = True
+
+
+class _Directory:
+    def __init__(self):
+        self.state = None
+        self.generation = 0
+        self.checked = 0
+        self.responses = collections.OrderedDict()
+
+
+class DirectoryCache:
+    '''Rendered directory responses per company, valid as long as the GAB
+       sync state does not change. The state is checked at most every
+       interval seconds, with an incremental sync from the last state.'''
+
+    def __init__(self, maxsize=DIRECTORY_CACHE_SIZE, interval=DIRECTORY_CACHE_CHECK_INTERVAL):
+        self.maxsize = maxsize
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.directories = {}
+
+    def _check(self, server, company):
+        with self.lock:
+            directory = self.directories.get(company)
+            if directory is None:
+                directory = self.directories[company] = _Directory()
+            now = time.monotonic()
+            if now - directory.checked < self.interval:
+                return directory
+            # Other requests use the cached responses meanwhile.
+            directory.checked = now
+            state = directory.state
+
+        changes = _GABChanges()
+        try:
+            state = server.sync_gab(changes, state)
+        except Exception:
+            logging.warning('failed to sync GAB of company %s, clearing directory cache', company, exc_info=True)
+            state, changes.changed = None, True
+
+        with self.lock:
+            if changes.changed or state is None:
+                directory.responses.clear()
+                directory.generation += 1
+            directory.state = state
+        return directory
+
+    def get(self, server, company, key):
+        '''Returns the cached response for key or None, and the generation
+           to pass to put when the response is rendered.'''
+        if not self.maxsize:
+            return None, None
+        directory = self._check(server, company)
+        with self.lock:
+            data = directory.responses.get(key)
+            if data is not None:
+                directory.responses.move_to_end(key)
+            return data, directory.generation
+
+    def put(self, company, key, data, generation):
+        '''Stores the response for key, unless the directory changed while
+           it was rendered.'''
+        if not self.maxsize:
+            return
+        with self.lock:
+            directory = self.directories.get(company)
+            if directory is None or directory.state is None or directory.generation != generation:
+                return
+            directory.responses[key] = data
+            while len(directory.responses) > self.maxsize:
+                directory.responses.popitem(last=False)
+
+
+class BodyCache:
+    '''Rendered item bodies by (entryid, changekey, content type), least
+       recently used first. The change key changes with the body, so entries
+       never have to be invalidated. Bodies larger than a quarter of the
+       cache are not stored.'''
+
+    def __init__(self, maxsize=BODY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.size = 0
+        self.lock = threading.Lock()
+        self.bodies = collections.OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            body = self.bodies.get(key)
+            if body is not None:
+                self.bodies.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.maxsize // 4:
+            return
+        with self.lock:
+            old = self.bodies.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.bodies[key] = body
+            self.size += len(body)
+            while self.size > self.maxsize:
+                self.size -= len(self.bodies.popitem(last=False)[1])
+
+
+def session_company(server):
+    '''Returns userid and company name of the user of a session.'''
+    try:
+        return _session_companies[server]
+    except KeyError:
+        pass
+    userid = kopano.Store(server=server, mapiobj=server.mapistore).user.userid
+    company = server.user(userid=userid).company.name
+    _session_companies[server] = userid, company
+    return userid, company
+
+
+directory_cache = DirectoryCache()
+body_cache = BodyCache()
+# Sessions are reused by requests of the same user.
+_session_companies = weakref.WeakKeyDictionary()
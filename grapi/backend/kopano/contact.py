@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
-from .item import ItemResource
+from .item import ItemResource, parent_folder_id
 from .resource import _date
 from .utils import HTTPBadRequest, _folder, _item, experimental
 
@@ -34,7 +34,7 @@ class ContactResource(ItemResource):
     fields.update({
         'displayName': lambda item: item.name,
         'emailAddresses': lambda item: [{'name': a.name, 'address': a.email} for a in item.addresses()],
-        'parentFolderId': lambda item: item.folder.entryid,
+        'parentFolderId': lambda req, item: parent_folder_id(req, item),
         'givenName': lambda item: item.first_name or None,
         'middleName': lambda item: item.middle_name or None,
         'surname': lambda item: item.last_name or None,
@@ -97,7 +97,7 @@ class ContactResource(ItemResource):
     def on_get_contacts(self, req, resp):
         _, store, _ = req.context.server_store
         data = self.folder_gen(req, store.contacts)
-        self.respond(req, resp, data, ContactResource.fields)
+        self.respond(req, resp, data, ContactResource.fields, folder=store.contacts)
 
     def on_get(self, req, resp, userid=None, folderid=None, itemid=None, method=None):
         handler = None
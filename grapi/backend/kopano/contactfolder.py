@@ -37,7 +37,7 @@ class ContactFolderResource(FolderResource):
         folder = _folder(store, folderid)
         data = self.folder_gen(req, folder)
         fields = ContactResource.fields
-        self.respond(req, resp, data, fields)
+        self.respond(req, resp, data, fields, folder=folder)
 
     @experimental
     def on_get_contact_folders(self, req, resp):
@@ -10,7 +10,7 @@ from kopano.defs import ASF_MEETING
 from grapi.api.v1.schema import event as event_schema
 
 from .item import ItemResource, get_body, get_email, set_body
-from .resource import _date, _start_end, _tzdate, set_date
+from .resource import _date, _memo, _start_end, _tzdate, set_date
 from .utils import HTTPBadRequest, HTTPNotFound, _folder, experimental
 
 pattern_map = {
@@ -115,6 +115,19 @@ def attendees_json(item):
     return result
 
 
+def event_attendees(req, item):
+    """Return attendees of an event, occurrence or exception.
+
+    Occurrences of a series share the attendees of the series, which are
+    read once per request. Exceptions can have attendees of their own.
+    """
+    if isinstance(item, kopano.Occurrence) and item.exception:
+        key = ('attendees', item.eventid)
+    else:
+        key = ('attendees', item.entryid)
+    return _memo(req, key, attendees_json, item)
+
+
 def location_json(item):
     if not item.location or item.location.strip() == '':
         return None
@@ -186,16 +199,37 @@ def is_event_organizer(req, item):
         return False
 
     userstore = req.context.user_store
-    if userstore == item.store:
+    store = item.store
+    if userstore == store:
         return True
 
+    return _memo(req, ('delegate', store.guid, userstore.guid), _is_delegate, store, userstore)
+
+
+def _is_delegate(store, userstore):
     try:
-        item.store.user.delegation(userstore.user)
+        store.user.delegation(userstore.user)
         return True
     except kopano.errors.NotFoundError:
         return False
 
 
+def _eventid(item):
+    return item.eventid
+
+
+def series_master_id(req, item):
+    """Return the event ID of the series master of an occurrence.
+
+    Occurrences of a series share their master item, which is resolved once
+    per request.
+    """
+    if not item.recurring or not isinstance(item, kopano.Occurrence):
+        return None
+    master = item.item
+    return _memo(req, ('series_master_id', master.entryid), _eventid, master)
+
+
 class EventResource(ItemResource):
     fields = ItemResource.fields.copy()
     fields.update({
@@ -211,11 +245,11 @@ class EventResource(ItemResource):
         'body': lambda req, item: get_body(req, item),
         'isReminderOn': lambda item: item.reminder,
         'reminderMinutesBeforeStart': lambda item: item.reminder_minutes,
-        'attendees': lambda item: attendees_json(item),
+        'attendees': lambda req, item: event_attendees(req, item),
         'bodyPreview': lambda item: item.body_preview,
         'isAllDay': lambda item: item.all_day,
         'showAs': lambda item: show_as_map[item.show_as],
-        'seriesMasterId': lambda item: item.item.eventid if item.recurring and isinstance(item, kopano.Occurrence) else None,
+        'seriesMasterId': lambda req, item: series_master_id(req, item),
         'type': lambda item: event_type(item),
         'responseRequested': lambda item: item.response_requested,
         'iCalUId': lambda item: kopano.hex(kopano.bdec(item.icaluid)) if item.icaluid else None,  # graph uses hex!?
@@ -281,15 +315,14 @@ class EventResource(ItemResource):
         store = req.context.server_store[1]
         calendar = store.calendar
         data = self.generator(req, calendar.items, calendar.count)
-        self.respond(req, resp, data, EventResource.fields)
+        self.respond(req, resp, data, EventResource.fields, folder=calendar)
 
     def on_get_by_folderid(self, req, resp, folderid):
         """Get events of a specific folder."""
         _, store, _ = req.context.server_store
         folder = store.folder(folderid)
-        store.calendar = folder
-        data = self.generator(req, store.calendar.items, store.calendar.count)
-        self.respond(req, resp, data, EventResource.fields)
+        data = self.generator(req, folder.items, folder.count)
+        self.respond(req, resp, data, EventResource.fields, folder=folder)
 
     def on_get_by_eventid(self, req, resp, itemid):
         store = req.context.server_store[1]
@@ -2,6 +2,7 @@
 import kopano
 
 from . import user  # import as module since this is a circular import
+from .cache import session_company
 from .resource import DEFAULT_TOP, Resource
 from .utils import HTTPBadRequest, _get_group_by_id, experimental
 
@@ -37,8 +38,16 @@ class GroupResource(Resource):
         self.respond(req, resp, data)
 
     def _handle_get_without_groupid(self, req, resp, server):
-        data = (server.groups(), DEFAULT_TOP, 0, 0)
-        self.respond(req, resp, data)
+        def render():
+            data = (server.groups(), DEFAULT_TOP, 0, 0)
+            self.respond(req, resp, data)
+
+        try:
+            _, company = session_company(server)
+        except kopano.errors.NotFoundError:
+            render()
+        else:
+            self.respond_directory(req, resp, server, company, (), render)
 
     @experimental
     def on_get_member_of(self, req, resp):
@@ -4,18 +4,70 @@ import codecs
 import datetime
 
 import dateutil
+import kopano
+from kopano.errors import NotFoundError
+from MAPI.Tags import PR_PARENT_ENTRYID
 
-from .resource import DEFAULT_TOP, Resource, _date
+from .cache import body_cache
+from .resource import DEFAULT_TOP, Resource, _date, _memo
+from .table import ITEM_COLUMNS, bind_columns
 from .utils import db_get, db_put, experimental
 
 
+def _body_key(item, content_type):
+    # Occurrences share the entry ID of their series, and embedded items
+    # have none, so their bodies are not cached.
+    if isinstance(item, kopano.Occurrence):
+        return None
+    try:
+        changekey = item.changekey
+        if not changekey:
+            return None
+        return item.entryid, changekey, content_type
+    except (NotFoundError, TypeError):  # Embedded items fail with TypeError.
+        return None
+
+
 def get_body(req, item):
     prefer_body_content_type = req.context.prefer.get('outlook.body-content-type')
+    content_type = 'text' if prefer_body_content_type == 'text' else 'html'
+
+    key = _body_key(item, content_type) if body_cache.maxsize else None
+    if key is not None:
+        content = body_cache.get(key)
+        if content is not None:
+            return {'contentType': content_type, 'content': content}
 
-    if prefer_body_content_type == 'text':
-        return {'contentType': 'text', 'content': item.text}
+    if content_type == 'text':
+        content = item.text
     else:
-        return {'contentType': 'html', 'content': codecs.decode(item.html_utf8, 'utf-8')}  # TODO can we use bytes to avoid recoding?
+        # The JSON encoder needs str, so the UTF-8 bytes are decoded once
+        # here and cached in their decoded form.
+        content = item.html_utf8.decode('utf-8')
+
+    if key is not None:
+        body_cache.put(key, content)
+    return {'contentType': content_type, 'content': content}
+
+
+def _folder_entryid(item):
+    return item.folder.entryid
+
+
+def parent_folder_id(req, item):
+    """Return the entry ID of the folder of an item.
+
+    Each folder is opened once per request.
+
+    Args:
+        req (Request): Falcon request object.
+        item (Item): item object.
+
+    Returns:
+        str: folder entry ID.
+    """
+    parent = item.prop(PR_PARENT_ENTRYID).value
+    return _memo(req, ('parent_folder_id', parent), _folder_entryid, item)
 
 
 def set_body(item, arg):
@@ -58,6 +110,8 @@ class ItemResource(Resource):
         'categories': lambda item: item.categories,
     }
 
+    columns = bind_columns(fields, ITEM_COLUMNS)
+
     @experimental
     def delta(self, req, resp, folder):
         args = self.parse_qs(req)
@@ -1,13 +1,75 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 import falcon
+from kopano.errors import NotFoundError
+from MAPI import MAPI_BCC, MAPI_CC, MAPI_TO, MAPI_UNICODE
+from MAPI.Defs import PROP_TYPE
+from MAPI.Tags import (PR_ADDRTYPE_W, PR_DISPLAY_NAME_W, PR_EMAIL_ADDRESS_W, PR_RECIPIENT_TYPE, PR_SMTP_ADDRESS_W,
+                       PT_ERROR)
 
 from grapi.api.v1.schema import message as message_schema
 
 from . import attachment  # import as module since this is a circular import
-from .item import ItemResource, get_body, get_email, set_body
-from .resource import _date
+from .item import ItemResource, get_body, get_email, parent_folder_id, set_body
+from .resource import _date, _memo
+from .table import MESSAGE_COLUMNS, bind_columns
 from .utils import HTTPNotFound, _folder, _item, experimental
 
+RECIPIENT_COLUMNS = [PR_RECIPIENT_TYPE, PR_DISPLAY_NAME_W, PR_ADDRTYPE_W, PR_EMAIL_ADDRESS_W, PR_SMTP_ADDRESS_W]
+RECIPIENT_TYPES = {MAPI_TO: 'to', MAPI_CC: 'cc', MAPI_BCC: 'bcc'}
+
+
+def _recipients_json(item):
+    """Return recipients of an item by type, read from its recipient table
+    at once.
+
+    Args:
+        item (Item): item object.
+
+    Returns:
+        Dict: lists of recipients as get_email formats them, by pyko type.
+    """
+    result = {'to': [], 'cc': [], 'bcc': []}
+    table = item.mapiobj.GetRecipientTable(MAPI_UNICODE)
+    table.SetColumns(RECIPIENT_COLUMNS, 0)
+    for row in table.QueryRows(2147483647, 0):
+        props = {prop.ulPropTag: prop.Value for prop in row if PROP_TYPE(prop.ulPropTag) != PT_ERROR}
+        type_ = RECIPIENT_TYPES.get(props.get(PR_RECIPIENT_TYPE))
+        if type_ is None:
+            continue
+        address = props.get(PR_SMTP_ADDRESS_W)
+        if address is None and props.get(PR_ADDRTYPE_W) == 'SMTP':
+            address = props.get(PR_EMAIL_ADDRESS_W)
+        if address is None:
+            # Needs an address book lookup, leave that to pyko.
+            return {
+                'to': [get_email(to) for to in item.to],
+                'cc': [get_email(cc) for cc in item.cc],
+                'bcc': [get_email(bcc) for bcc in item.bcc],
+            }
+        result[type_].append({'emailAddress': {'name': props.get(PR_DISPLAY_NAME_W, ''), 'address': address}})
+    return result
+
+
+def recipients_json(req, item, type_):
+    """Return recipients of an item of a type.
+
+    The recipient table of an item is read once per request for all types.
+
+    Args:
+        req (Request): Falcon request object.
+        item (Item): item object.
+        type_ (str): recipient type, 'to', 'cc' or 'bcc'.
+
+    Returns:
+        List: recipients as get_email formats them.
+    """
+    try:
+        key = ('recipients', item.entryid)
+    except (NotFoundError, TypeError):
+        # Embedded messages have no entry ID.
+        return _recipients_json(item)[type_]
+    return _memo(req, key, _recipients_json, item)[type_]
+
 
 def set_recipients(item, recipients, field="to"):
     """Set recipients field in an item.
@@ -91,15 +153,15 @@ class MessageResource(ItemResource):
         'body': lambda req, item: get_body(req, item),
         'from': lambda item: get_email(item.from_),
         'sender': lambda item: get_email(item.sender),
-        'toRecipients': lambda item: [get_email(to) for to in item.to],
-        'ccRecipients': lambda item: [get_email(cc) for cc in item.cc],
-        'bccRecipients': lambda item: [get_email(bcc) for bcc in item.bcc],
+        'toRecipients': lambda req, item: recipients_json(req, item, 'to'),
+        'ccRecipients': lambda req, item: recipients_json(req, item, 'cc'),
+        'bccRecipients': lambda req, item: recipients_json(req, item, 'bcc'),
         'sentDateTime': lambda item: _date(item.sent) if item.sent else None,
         'receivedDateTime': lambda item: _date(item.received) if item.received else None,
         'hasAttachments': lambda item: item.has_attachments,
         'internetMessageId': lambda item: item.messageid,
         'importance': lambda item: item.urgency.title(),
-        'parentFolderId': lambda item: item.folder.entryid,
+        'parentFolderId': lambda req, item: parent_folder_id(req, item),
         'conversationId': lambda item: item.conversationid,
         'isRead': lambda item: item.read,
         'isReadReceiptRequested': lambda item: item.read_receipt,
@@ -112,6 +174,8 @@ class MessageResource(ItemResource):
         'internetMessageHeaders': lambda item: get_internet_headers(item),
     }
 
+    columns = bind_columns(fields, MESSAGE_COLUMNS)
+
     set_fields = {
         'subject': lambda item, value: update_attr_value(item, "subject", value),
         'body': set_body,
@@ -147,8 +211,9 @@ class MessageResource(ItemResource):
             resp (Response): Falcon response object.
         """
         _, store, _ = req.context.server_store
-        data = self.folder_gen(req, store.inbox)
-        self.respond(req, resp, data, MessageResource.fields)
+        inbox = store.inbox
+        data = self.folder_gen(req, inbox)
+        self.respond(req, resp, data, MessageResource.fields, folder=inbox)
 
     def on_get_delta(self, req, resp, folderid=None):
         """Get delta messages sync by folder ID.
@@ -191,9 +256,9 @@ class MessageResource(ItemResource):
 
     def on_get_messages_by_folderid(self, req, resp, folderid):
         store = req.context.server_store[1]
-        data = _folder(store, folderid)
-        data = self.folder_gen(req, data)
-        self.respond(req, resp, data, MessageResource.fields)
+        folder = _folder(store, folderid)
+        data = self.folder_gen(req, folder)
+        self.respond(req, resp, data, MessageResource.fields, folder=folder)
 
     def on_get_value(self, req, resp, folderid=None, itemid=None):
         """Get a message as RFC-2822 by folder ID.
@@ -1,17 +1,27 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
+import calendar
 import datetime
+import functools
+import hashlib
 import logging
 import time
 
 import dateutil.parser
+import kopano
 import pytz
 import tzlocal
+from kopano.errors import NotFoundError
+from MAPI.Defs import PROP_TYPE
+from MAPI.Tags import PR_CONTENT_COUNT, PR_CONTENT_UNREAD, PR_DELETED_COUNT_TOTAL, PR_LOCAL_COMMIT_TIME_MAX, PT_ERROR
 
 from grapi.api.v1.resource import HTTPBadRequest
 from grapi.api.v1.resource import Resource as BaseResource
-from grapi.api.v1.resource import _dumpb_json, _encode_qs, _parse_qs
+from grapi.api.v1.resource import JSON_PRETTY, _coalesce, _dumpb_json, _encode_qs, _etag, _parse_qs
 from grapi.api.v1.timezone import to_timezone
 
+from .cache import directory_cache
+from .table import SORT_COLUMNS, TableRow, table_columns, table_items
+
 
 UTC = pytz.utc
 LOCAL = tzlocal.get_localzone()
@@ -19,9 +29,43 @@ LOCAL = tzlocal.get_localzone()
 DEFAULT_TOP = 10
 
 
-def _date(d, local=False, show_time=True):
-    if d is None:
-        return '0001-01-01T00:00:00Z'
+# Dates are formatted by hand, with UTC offsets looked up per hour of wall
+# time. Hours near a transition are not cached and take the slow path, as
+# time.mktime may resolve ambiguous times either way. So do years strftime
+# does not pad.
+_BEFORE = datetime.timedelta(hours=1)
+_AFTER = datetime.timedelta(hours=2, seconds=-1)
+_OFFSETS_MAX = 8192
+
+
+@functools.lru_cache(maxsize=_OFFSETS_MAX)
+def _mktime_offset(year, month, day, hour):
+    # Offset from naive local to UTC time, as time.mktime applies it.
+    def offset(d):
+        t = d.timetuple()
+        return datetime.timedelta(seconds=time.mktime(t) - calendar.timegm(t))
+    d = datetime.datetime(year, month, day, hour)
+    before = offset(d - _BEFORE)
+    return before if before == offset(d + _AFTER) else None
+
+
+@functools.lru_cache(maxsize=_OFFSETS_MAX)
+def _local_offset(year, month, day, hour):
+    # Offset from UTC to naive local time, as LOCAL.localize applies it.
+    d = datetime.datetime(year, month, day, hour)
+    before = LOCAL.localize(d - _BEFORE).utcoffset()
+    return before if before == LOCAL.localize(d + _AFTER).utcoffset() else None
+
+
+@functools.lru_cache(maxsize=_OFFSETS_MAX)
+def _zone_offset(tz, year, month, day, hour):
+    # Offset from UTC to the time in tz, for an hour of UTC time.
+    d = UTC.localize(datetime.datetime(year, month, day, hour))
+    before = (d - _BEFORE).astimezone(tz).utcoffset()
+    return before if before == (d + _AFTER).astimezone(tz).utcoffset() else None
+
+
+def _date_slow(d, local=False, show_time=True):
     fmt = '%Y-%m-%d'
     if show_time:
         fmt += 'T%H:%M:%S'
@@ -35,28 +79,65 @@ def _date(d, local=False, show_time=True):
     return d.strftime(fmt)
 
 
-# TODO: re-order args? req, d, tzinfo=None?
-def _tzdate(d, tzinfo, req):
+def _date(d, local=False, show_time=True):
     if d is None:
-        return None
+        return '0001-01-01T00:00:00Z'
+    offset = _mktime_offset(d.year, d.month, d.day, d.hour) if 1000 < d.year < 9999 else None
+    if offset is None:
+        return _date_slow(d, local, show_time)
+    u = d + offset
+    s = '%04d-%02d-%02d' % (u.year, u.month, u.day)
+    if show_time:
+        s += 'T%02d:%02d:%02d' % (u.hour, u.minute, u.second)
+    if d.microsecond:
+        # The microseconds are lost in the conversion to UTC.
+        s += '.000000'
+    if not local:
+        s += 'Z'
+    return s
 
-    fmt = '%Y-%m-%dT%H:%M:%S'
 
+def _tzdate_slow(d, tz):
     if d.tzinfo is None:
         # NOTE(longsleep): pyko uses naive localtime..
         d = LOCAL.localize(d)
+    return d.astimezone(tz).replace(tzinfo=None).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _tzformat(d, tz):
+    if not 1000 < d.year < 9999:
+        return _tzdate_slow(d, tz)
+    if d.tzinfo is None:
+        offset = _local_offset(d.year, d.month, d.day, d.hour)
+        if offset is None:
+            return _tzdate_slow(d, tz)
+        u = d - offset
+    else:
+        u = d.replace(tzinfo=None) - d.utcoffset()
+    if tz is not UTC:
+        offset = _zone_offset(tz, u.year, u.month, u.day, u.hour)
+        if offset is None:
+            return _tzdate_slow(d, tz)
+        u += offset
+    return '%04d-%02d-%02dT%02d:%02d:%02d' % (u.year, u.month, u.day, u.hour, u.minute, u.second)
+
+
+# TODO: re-order args? req, d, tzinfo=None?
+def _tzdate(d, tzinfo, req):
+    if d is None:
+        return None
 
     # Apply timezone preference when set in request context.
     prefer_tz = req.context.prefer.get('outlook.timezone')
     if prefer_tz and prefer_tz[0]:
-        d = d.astimezone(prefer_tz[0]).replace(tzinfo=None)
+        tz = prefer_tz[0]
         prefer_timeZone = prefer_tz[1]
     else:
+        tz = UTC
         prefer_timeZone = 'UTC'
-        d = d.astimezone(UTC).replace(tzinfo=None)
 
     return {
-        'dateTime': d.strftime(fmt),
+        'dateTime': _tzformat(d, tz),
         'timeZone': prefer_timeZone,  # TODO error
     }
 
@@ -117,6 +198,74 @@ def _start_end(req):
     return _parse_date(args, 'startDateTime'), _parse_date(args, 'endDateTime')
 
 
+def _memo(req, key, func, *args):
+    """Return func(*args), called once per request for key.
+
+    Args:
+        req (Request): Falcon request object.
+        key (Tuple): what the value depends on.
+        func (Callable): function returning the value.
+
+    Returns:
+        Any: value.
+    """
+    memo = req.context.memo
+    try:
+        return memo[key]
+    except KeyError:
+        value = memo[key] = func(*args)
+        return value
+
+
+# Rendering plans by id of the field accessor dict, which is kept with them
+# so the id stays unique.
+_field_plans = {}
+_merged_fields = {}
+FIELD_PLANS_MAX = 256  # Per accessor dict, $select can be anything.
+
+
+def _field_plan(fields, all_fields):
+    """Return the rendering plan of fields.
+
+    Args:
+        fields (Iterable[str]): names of fields to render.
+        all_fields (Dict): field accessors by name.
+
+    Returns:
+        Tuple: (name, accessor, needs_req) of fields which have an accessor.
+    """
+    entry = _field_plans.get(id(all_fields))
+    if entry is None:
+        entry = _field_plans[id(all_fields)] = (all_fields, {})
+    plans = entry[1]
+
+    key = None if fields is all_fields else frozenset(fields)
+    plan = plans.get(key)
+    if plan is None:
+        if len(plans) >= FIELD_PLANS_MAX:
+            plans.clear()
+        plan = []
+        for name in fields:
+            accessor = all_fields.get(name)
+            if accessor is not None:
+                plan.append((name, accessor, accessor.__code__.co_argcount != 1))
+        plan = plans[key] = tuple(plan)
+    return plan
+
+
+# Folder properties which change with the contents of a folder.
+FOLDER_KEY_TAGS = [PR_LOCAL_COMMIT_TIME_MAX, PR_CONTENT_COUNT, PR_CONTENT_UNREAD, PR_DELETED_COUNT_TOTAL]
+
+
+def _folder_key(folder):
+    # A single GetProps, unlike folder.state which runs a sync.
+    values = []
+    for prop in folder.mapiobj.GetProps(FOLDER_KEY_TAGS, 0):
+        value = prop.Value if PROP_TYPE(prop.ulPropTag) != PT_ERROR else None
+        values.append(str(getattr(value, 'filetime', value)))
+    return hashlib.sha1(':'.join(values).encode('ascii')).hexdigest()[:24]
+
+
 class Resource(BaseResource):
 
     # If a resource doesn't need to have access to a store, set it False.
@@ -145,17 +294,28 @@ class Resource(BaseResource):
     # and etc which are not exists in the other fields.
     individual_fields = {}
 
+    # Contents table columns of fields, to render listings from table rows
+    # instead of items. See table.bind_columns.
+    columns = {}
+
     def get_fields(self, req, obj, fields, all_fields):
-        fields = fields or all_fields or self.fields
         result = {}
-        for f in fields:
-            accessor = all_fields.get(f, None)
-            if accessor is not None:
-                if accessor.__code__.co_argcount == 1:
-                    # TODO(longsleep): Remove this mode of operation.
-                    result[f] = accessor(obj)
-                else:
-                    result[f] = accessor(req, obj)
+        row = obj if isinstance(obj, TableRow) else None
+        for name, accessor, needs_req in _field_plan(fields or all_fields or self.fields, all_fields):
+            if row is not None:
+                column = row.columns.get(name)
+                if column is not None and column[2] is accessor:
+                    try:
+                        result[name] = column[1](row)
+                        continue
+                    except KeyError:
+                        pass
+                obj = row.item
+            if needs_req:
+                result[name] = accessor(req, obj)
+            else:
+                # TODO(longsleep): Remove this mode of operation.
+                result[name] = accessor(obj)
 
         # TODO do not handle here
         if '@odata.type' in result and not result['@odata.type']:
@@ -171,12 +331,11 @@ class Resource(BaseResource):
         return _dumpb_json(data)
 
     def json_multi(self, req, obj, fields, all_fields, top, skip, count, deltalink, add_count=False):
-        header = b'{\n'
-        header += b'  "@odata.context": "%s",\n' % req.path.encode('utf-8')
+        header = [(b'@odata.context', b'"%s"' % req.path.encode('utf-8'))]
         if add_count:
-            header += b'  "@odata.count": "%d",\n' % count
+            header.append((b'@odata.count', b'"%d"' % count))
         if deltalink:
-            header += b'  "@odata.deltaLink": "%s",\n' % deltalink
+            header.append((b'@odata.deltaLink', b'"%s"' % deltalink))
         else:
             path = req.path
             if req.query_string:
@@ -187,23 +346,31 @@ class Resource(BaseResource):
                 args = {}
             args['$skip'] = skip+top
             nextLink = path + '?' + _encode_qs(list(args.items()))
-            header += b'  "@odata.nextLink": "%s",\n' % (_dumpb_json(nextLink)[1:-1])
-        header += b'  "value": [\n'
-        yield header
-        first = True
+            header.append((b'@odata.nextLink', _dumpb_json(nextLink)))
+
+        # Items are encoded once, pretty output is indented by replacing
+        # newlines within the encoded item.
+        if JSON_PRETTY:
+            yield b'{\n' + b''.join(b'  "%s": %s,\n' % field for field in header) + b'  "value": [\n'
+            first_sep, sep, newline, end = b'    ', b',\n    ', b'\n    ', b'\n  ]\n}'
+        else:
+            yield b'{' + b''.join(b'"%s":%s,' % field for field in header) + b'"value":['
+            first_sep, sep, newline, end = b'', b',', None, b']}'
+
         try:
             for o in obj:
                 if isinstance(o, tuple):
                     o, resource = o
                     all_fields = resource.fields
-                if not first:
-                    yield b',\n'
-                first = False
                 wa = self.json(req, o, fields, all_fields, multi=True)
-                yield b'\n'.join([b'    '+line for line in wa.splitlines()])
+                if newline is not None:
+                    wa = wa.replace(b'\n', newline)
+                yield first_sep + wa
+                first_sep = sep
         except Exception:
             logging.exception("failed to marshal %s JSON response", req.path)
-        yield b'\n  ]\n}'
+            req.context.render_failed = True
+        yield end
 
     def _get_fields(self, data, is_select_query=False):
         """Return fields based on fetched data.
@@ -215,6 +382,14 @@ class Resource(BaseResource):
         Returns:
             Dict: dictionary of fields which should be represented.
         """
+        # Merged once per class, as the same dict also keeps its plans cached.
+        key = (type(self), isinstance(data, tuple), is_select_query)
+        fields = _merged_fields.get(key)
+        if fields is None:
+            fields = _merged_fields[key] = self._merge_fields(data, is_select_query)
+        return fields
+
+    def _merge_fields(self, data, is_select_query):
         if isinstance(data, tuple):
             if is_select_query:
                 # Users should be able to select in both fields (standard and complementary).
@@ -226,11 +401,42 @@ class Resource(BaseResource):
         else:
             return {**self.fields, **self.complementary_fields, **self.individual_fields}
 
-    def respond(self, req, resp, obj, all_fields=None, deltalink=None):
+    def etag(self, req, obj, folder=None):
+        """Return entity tag of a response.
+
+        Args:
+            req (Request): Falcon request object.
+            obj (Union[Item, Tuple]): single object or generated collection.
+            folder (Folder): folder of which the collection lists contents.
+
+        Returns:
+            Optional[str]: entity tag or None if the response has none.
+        """
+        if isinstance(obj, tuple):
+            if folder is None:
+                return None
+            key = _folder_key(folder)
+        elif isinstance(obj, (kopano.Item, kopano.Occurrence)):
+            # Changing the read flag does not change the changekey.
+            try:
+                key = '%s.%d' % (obj.changekey, obj.read)
+            except NotFoundError:
+                return None
+        else:
+            return None
+        return _etag(req, key)
+
+    def respond(self, req, resp, obj, all_fields=None, deltalink=None, folder=None):
+        # Clients with the current version get 304, before rendering anything.
+        if deltalink is None and req.method == 'GET':
+            etag = self.etag(req, obj, folder)
+            if etag is not None:
+                self.respond_304(req, resp, etag)
+
         # determine fields
         args = self.parse_qs(req)
         if '$select' in args:
-            fields = set(args['$select'][0].split(',') + ['@odata.type', '@odata.etag', 'id'])
+            fields = frozenset(args['$select'][0].split(',') + ['@odata.type', '@odata.etag', 'id'])
             is_select_query = True
         else:
             fields = None
@@ -249,7 +455,7 @@ class Resource(BaseResource):
             obj, top, skip, count = obj
             add_count = '$count' in args and args['$count'][0] == 'true'
 
-            resp.stream = self.json_multi(req, obj, fields, all_fields, top, skip, count, deltalink, add_count)
+            resp.stream = _coalesce(self.json_multi(req, obj, fields, all_fields, top, skip, count, deltalink, add_count))
 
         # single object
         else:
@@ -268,6 +474,34 @@ class Resource(BaseResource):
                         expand[field.split('/')[1]] = self.get_fields(req, obj2, resource.fields, resource.fields)
             resp.body = self.json(req, obj, fields, all_fields, expand=expand)
 
+    def respond_directory(self, req, resp, server, company, key, render):
+        """Respond with a cached directory response of a company, or render
+        and cache it.
+
+        Responses are cached until the GAB of the company changes.
+
+        Args:
+            req (Request): Falcon request object.
+            resp (Response): Falcon response object.
+            server (Server): server session of the user.
+            company (str): company name of the user.
+            key (Tuple): what the response depends on, besides path and query string.
+            render (Callable): function responding when the response is not cached.
+        """
+        key = (req.path, req.query_string) + key
+        data, generation = directory_cache.get(server, company, key)
+        if data is None:
+            render()
+            data = resp.body
+            if resp.stream is not None:
+                data = b''.join(resp.stream)
+                resp.stream = None
+            # Do not cache responses which miss items.
+            if data is not None and not req.context.render_failed:
+                directory_cache.put(company, key, data, generation)
+        resp.content_type = "application/json"
+        resp.body = data
+
     def generator(self, req, generator, count=0, args=None):
         """Response generator.
 
@@ -339,5 +573,17 @@ class Resource(BaseResource):
                 for item in folder.items(query=query):
                     yield item
             return self.generator(req, yielder, 0, args=args)
+        elif self.columns:
+            columns = self.columns
+            if '$select' in args:
+                tags = table_columns(columns, args['$select'][0].split(',') + ['@odata.type', '@odata.etag', 'id'])
+            else:
+                tags = table_columns(columns, columns)
+
+            def rows(page_start=None, page_limit=None, order=None):
+                if order and not all(name.lstrip('-') in SORT_COLUMNS for name in order):
+                    return folder.items(page_start=page_start, page_limit=page_limit, order=order)
+                return table_items(folder, columns, tags, page_start=page_start, page_limit=page_limit, order=order)
+            return self.generator(req, rows, folder.count, args=args)
         else:
             return self.generator(req, folder.items, folder.count, args=args)
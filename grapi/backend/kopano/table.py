@@ -0,0 +1,165 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Contents table access for listings.
+
+Listing items through pyko opens every item and fetches its properties one by
+one. Instead, a page is fetched with a single QueryRows on the contents table
+with the columns the requested fields need, and fields are rendered from the
+row data. Items are only opened for fields which have no column.
+"""
+import datetime
+
+from kopano.compat import benc as _benc
+from MAPI import BOOKMARK_BEGINNING, MAPI_DEFERRED_ERRORS, TABLE_SORT_ASCEND, TABLE_SORT_DESCEND, TBL_BATCH
+from MAPI.Defs import PROP_TYPE
+from MAPI.Struct import SSort, SSortOrderSet
+from MAPI.Tags import (PR_CHANGE_KEY, PR_CLIENT_SUBMIT_TIME, PR_CREATION_TIME, PR_ENTRYID, PR_HASATTACH,
+                       PR_IMPORTANCE, PR_INTERNET_MESSAGE_ID_W, PR_LAST_MODIFICATION_TIME, PR_MESSAGE_CLASS_W,
+                       PR_MESSAGE_DELIVERY_TIME, PR_MESSAGE_FLAGS, PR_READ_RECEIPT_REQUESTED, PR_SUBJECT_W, PT_ERROR)
+
+MSGFLAG_READ = 0x1
+URGENCY = {0: 'Low', 1: 'Normal', 2: 'High'}
+
+# Sort columns of pyko item attributes, as used in order of folder.items.
+SORT_COLUMNS = {
+    'subject': PR_SUBJECT_W,
+    'received': PR_MESSAGE_DELIVERY_TIME,
+    'created': PR_CREATION_TIME,
+}
+
+
+def _systime(value, default=None):
+    """Format a PT_SYSTIME column like _date formats the pyko datetime.
+
+    Args:
+        value (FileTime): column value.
+        default: returned when the column is empty.
+
+    Returns:
+        str: formatted date.
+    """
+    if value is None:
+        return default
+    d = datetime.datetime.utcfromtimestamp(value.unixtime)
+    if d.microsecond:
+        # _date prints the microseconds of the pyko value as zeros.
+        return d.replace(microsecond=0).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    return d.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+# Columns of item fields: (property tags, function rendering the field from
+# a TableRow). Rendering must give the same result as the field accessor, and
+# raise KeyError for missing values which the accessor has to provide.
+ITEM_COLUMNS = {
+    '@odata.etag': ((PR_CHANGE_KEY,), lambda row: 'W/"' + _benc(row.props[PR_CHANGE_KEY]) + '"'),
+    'id': ((PR_ENTRYID,), lambda row: row.entryid),
+    'changeKey': ((PR_CHANGE_KEY,), lambda row: _benc(row.props[PR_CHANGE_KEY])),
+    'createdDateTime': ((PR_CREATION_TIME,), lambda row: _systime(row.props.get(PR_CREATION_TIME), '0001-01-01T00:00:00Z')),
+    'lastModifiedDateTime': ((PR_LAST_MODIFICATION_TIME,), lambda row: _systime(row.props.get(PR_LAST_MODIFICATION_TIME), '0001-01-01T00:00:00Z')),
+}
+
+MESSAGE_COLUMNS = dict(ITEM_COLUMNS, **{
+    '@odata.type': ((PR_MESSAGE_CLASS_W,), lambda row: '#microsoft.graph.eventMessage' if row.props.get(PR_MESSAGE_CLASS_W, '').startswith('IPM.Schedule.Meeting.') else None),
+    'subject': ((PR_SUBJECT_W,), lambda row: row.props.get(PR_SUBJECT_W, '')),
+    'sentDateTime': ((PR_CLIENT_SUBMIT_TIME,), lambda row: _systime(row.props.get(PR_CLIENT_SUBMIT_TIME))),
+    'receivedDateTime': ((PR_MESSAGE_DELIVERY_TIME,), lambda row: _systime(row.props.get(PR_MESSAGE_DELIVERY_TIME))),
+    'hasAttachments': ((PR_HASATTACH,), lambda row: bool(row.props.get(PR_HASATTACH, False))),
+    'internetMessageId': ((PR_INTERNET_MESSAGE_ID_W,), lambda row: row.props.get(PR_INTERNET_MESSAGE_ID_W)),
+    'importance': ((PR_IMPORTANCE,), lambda row: URGENCY.get(row.props.get(PR_IMPORTANCE, 1), 'Normal')),
+    'parentFolderId': ((), lambda row: row.parent_id),
+    'isRead': ((PR_MESSAGE_FLAGS,), lambda row: bool(row.props.get(PR_MESSAGE_FLAGS, 0) & MSGFLAG_READ)),
+    'isReadReceiptRequested': ((PR_READ_RECEIPT_REQUESTED,), lambda row: bool(row.props.get(PR_READ_RECEIPT_REQUESTED, False))),
+    'isDeliveryReceiptRequested': ((PR_READ_RECEIPT_REQUESTED,), lambda row: bool(row.props.get(PR_READ_RECEIPT_REQUESTED, False))),
+})
+
+
+def bind_columns(fields, columns):
+    """Return columns of fields which render like their accessor.
+
+    Args:
+        fields (Dict): field accessors by name.
+        columns (Dict): columns of fields, see ITEM_COLUMNS.
+
+    Returns:
+        Dict: (property tags, render function, accessor) by field name. Only
+        used while the accessor of a field is the one bound here, as
+        subclasses can override fields.
+    """
+    return {name: column + (fields[name],) for name, column in columns.items() if name in fields}
+
+
+class TableRow:
+    """Row of a contents table, opening its item only when needed.
+
+    Attributes:
+        folder (Folder): folder of the contents table.
+        parent_id (str): entry ID of the folder.
+        props (Dict): column values by property tag, without errors.
+        columns (Dict): columns of fields, see bind_columns.
+    """
+
+    def __init__(self, folder, parent_id, props, columns):
+        self.folder = folder
+        self.parent_id = parent_id
+        self.props = props
+        self.columns = columns
+        self._item = None
+
+    @property
+    def entryid(self):
+        return _benc(self.props[PR_ENTRYID])
+
+    @property
+    def item(self):
+        if self._item is None:
+            self._item = self.folder.item(self.entryid)
+        return self._item
+
+
+def table_columns(columns, fields):
+    """Return the property tags needed to render fields from rows.
+
+    Args:
+        columns (Dict): columns of fields, see bind_columns.
+        fields (Iterable[str]): names of fields to render.
+
+    Returns:
+        List[int]: property tags, starting with PR_ENTRYID.
+    """
+    tags = [PR_ENTRYID]
+    for name in fields:
+        column = columns.get(name)
+        if column is not None:
+            tags.extend(tag for tag in column[0] if tag not in tags)
+    return tags
+
+
+def table_items(folder, columns, tags, page_start=None, page_limit=None, order=None):
+    """Yield rows of a folder contents table.
+
+    Args:
+        folder (Folder): folder.
+        columns (Dict): columns of fields, see bind_columns.
+        tags (List[int]): property tags to fetch, see table_columns.
+        page_start (int): index of first row.
+        page_limit (int): maximum number of rows.
+        order (Tuple[str]): pyko item attributes to sort on, '-' prefixed
+            for descending order.
+
+    Yields:
+        TableRow: row.
+    """
+    table = folder.mapiobj.GetContentsTable(MAPI_DEFERRED_ERRORS)
+    table.SetColumns(tags, TBL_BATCH)
+    if order:
+        sorts = [
+            SSort(SORT_COLUMNS[name.lstrip('-')], TABLE_SORT_DESCEND if name.startswith('-') else TABLE_SORT_ASCEND)
+            for name in order
+        ]
+        table.SortTable(SSortOrderSet(sorts, 0, 0), TBL_BATCH)
+    if page_start:
+        table.SeekRow(BOOKMARK_BEGINNING, page_start)
+
+    parent_id = folder.entryid
+    for row in table.QueryRows(page_limit if page_limit is not None else 0x7fffffff, 0):
+        props = {prop.ulPropTag: prop.Value for prop in row if PROP_TYPE(prop.ulPropTag) != PT_ERROR}
+        yield TableRow(folder, parent_id, props, columns)
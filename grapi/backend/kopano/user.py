@@ -7,6 +7,7 @@ import kopano
 
 from grapi.api.v1.schema import user as user_schema
 
+from .cache import session_company
 from .message import MessageResource
 from .resource import DEFAULT_TOP, Resource
 from .utils import HTTPNotFound, experimental
@@ -75,25 +76,37 @@ class UserResource(Resource):
         self.delta(req, resp, server=server)
 
     def _handle_get_with_userid(self, req, resp, server, userid):
-        data = server.user(userid=userid)
-        self.respond(req, resp, data)
+        def render():
+            data = server.user(userid=userid)
+            self.respond(req, resp, data)
+
+        try:
+            _, company = session_company(server)
+        except kopano.errors.NotFoundError:
+            render()
+        else:
+            self.respond_directory(req, resp, server, company, (userid,), render)
 
     def _handle_get_without_userid(self, req, resp, server):
         args = self.parse_qs(req)
-        userid = kopano.Store(server=server, mapiobj=server.mapistore).user.userid
         try:
-            company = server.user(userid=userid).company
+            userid, company = session_company(server)
         except kopano.errors.NotFoundError:
-            logging.warning('failed to get company for user %s', userid, exc_info=True)
+            logging.warning('failed to get company for user of session', exc_info=True)
             raise HTTPNotFound(description="The company wasn't found")
         query = None
         if '$search' in args:
             query = args['$search'][0]
 
-        def yielder(**kwargs):
-            yield from company.users(hidden=False, inactive=False, query=query, **kwargs)
-        data = self.generator(req, yielder)
-        self.respond(req, resp, data)
+        def render():
+            users = server.user(userid=userid).company.users
+
+            def yielder(**kwargs):
+                yield from users(hidden=False, inactive=False, query=query, **kwargs)
+            data = self.generator(req, yielder)
+            self.respond(req, resp, data)
+
+        self.respond_directory(req, resp, server, company, (), render)
 
     def on_get_me(self, req, resp):
         """Return 'me' user info.
@@ -103,8 +116,11 @@ class UserResource(Resource):
         :param resp: Falcon response object.
         :type resp: Response
         """
-        server, _, userid = req.context.server_store
-        userid = kopano.Store(server=server, mapiobj=server.mapistore).user.userid
+        server = req.context.server_store[0]
+        try:
+            userid, _ = session_company(server)
+        except kopano.errors.NotFoundError:
+            userid = kopano.Store(server=server, mapiobj=server.mapistore).user.userid
         self._handle_get_with_userid(req, resp, server, userid)
 
     def on_get_users(self, req, resp):
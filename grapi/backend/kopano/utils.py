@@ -153,9 +153,11 @@ def _server(req, options, forceReconnect=False):
                     forceReconnect = True
             if forceReconnect:
                 with threadLock:
-                    oldSessiondata = TOKEN_SESSION.pop(cacheid)
-                    DANGLE_INDEX += 1
-                    TOKEN_SESSION['{}_dangle_{}'.format(cacheid, DANGLE_INDEX)] = oldSessiondata
+                    # Another thread might have replaced the session already.
+                    if TOKEN_SESSION.get(cacheid) is sessiondata:
+                        del TOKEN_SESSION[cacheid]
+                        DANGLE_INDEX += 1
+                        TOKEN_SESSION['{}_dangle_{}'.format(cacheid, DANGLE_INDEX)] = sessiondata
                 sessiondata = None
                 if options and options.with_metrics:
                     DANGLING_COUNT.inc()
@@ -173,11 +175,15 @@ def _server(req, options, forceReconnect=False):
             sessiondata = [record, now]
             with threadLock:
                 if cacheid:
-                    TOKEN_SESSION[cacheid] = sessiondata
+                    # Another thread might have created a session for the
+                    # same token meanwhile, keep using the cached one then.
+                    cached = TOKEN_SESSION.setdefault(cacheid, sessiondata)
                 else:
                     DANGLE_INDEX += 1
-                    TOKEN_SESSION['_dangle_{}'.format(DANGLE_INDEX)] = sessiondata
-            if options and options.with_metrics:
+                    cached = TOKEN_SESSION['_dangle_{}'.format(DANGLE_INDEX)] = sessiondata
+            if cached is not sessiondata:
+                record = cached[0]
+            elif options and options.with_metrics:
                 SESSION_CREATE_COUNT.inc()
                 TOKEN_SESSION_ACTIVE.inc()
 
@@ -210,9 +216,11 @@ def _server(req, options, forceReconnect=False):
                     forceReconnect = True
             if forceReconnect:
                 with threadLock:
-                    oldSessiondata = PASSTHROUGH_SESSION.pop(cacheid)
-                    DANGLE_INDEX += 1
-                    PASSTHROUGH_SESSION['_dangle_{}'.format(DANGLE_INDEX)] = oldSessiondata
+                    # Another thread might have replaced the session already.
+                    if PASSTHROUGH_SESSION.get(cacheid) is sessiondata:
+                        del PASSTHROUGH_SESSION[cacheid]
+                        DANGLE_INDEX += 1
+                        PASSTHROUGH_SESSION['_dangle_{}'.format(DANGLE_INDEX)] = sessiondata
                 sessiondata = None
                 if options and options.with_metrics:
                     DANGLING_COUNT.inc()
@@ -229,8 +237,10 @@ def _server(req, options, forceReconnect=False):
             record = Record(server=server, store=store)
             sessiondata = [record, now]
             with threadLock:
-                PASSTHROUGH_SESSION[cacheid] = sessiondata
-            if options and options.with_metrics:
+                cached = PASSTHROUGH_SESSION.setdefault(cacheid, sessiondata)
+            if cached is not sessiondata:
+                record = cached[0]
+            elif options and options.with_metrics:
                 SESSION_CREATE_COUNT.inc()
                 PASSTHROUGH_SESSIONS_ACTIVE.inc()
 
@@ -20,7 +20,7 @@ SEARCH_SEARCH_FILTER_TEMPLATE = "(|({emailAttribute}=*%(search)s*)({givenNameAtt
 
 
 class UserResource(Resource):
-    l = None
+    conn = None
 
     uri = "ldap://127.0.0.1:389"
     baseDN = ""
@@ -91,16 +91,26 @@ class UserResource(Resource):
         if not self.uri or not self.baseDN:
             raise RuntimeError("missing LDAP_URI or LDAP_BASEDN in environment")
 
-        try:
-            self.l = ldap.ldapobject.ReconnectLDAPObject(self.uri, retry_max=self.retryMax, retry_delay=self.retryDelay)
-        except ldap.LDAPError:
-            logging.error("unable to connect to LDAP server", exc_info=True)
+        self.conn = None
+        self.bound = False
+        self.bind()
 
+    def bind(self):
+        # The resource is shared by all requests, a failed connect or bind is
+        # retried with the next request. The connection rebinds on reconnect.
+        if self.conn is None:
+            try:
+                self.conn = ldap.ldapobject.ReconnectLDAPObject(self.uri, retry_max=self.retryMax, retry_delay=self.retryDelay)
+            except ldap.LDAPError:
+                logging.error("unable to connect to LDAP server", exc_info=True)
+                return
         if self.bindDN is not None:
             try:
-                self.l.simple_bind_s(self.bindDN, self.bindPW)
+                self.conn.simple_bind_s(self.bindDN, self.bindPW)
             except ldap.LDAPError as excinfo:
                 logging.error("unable to authenticate with LDAP server: %s" % excinfo)
+                return
+        self.bound = True
 
     def on_get(self, req, resp, userid=None, method=None):
         if method:
@@ -111,7 +121,9 @@ class UserResource(Resource):
             if not userid:
                 raise HTTPBadRequest('No user')
 
-        l = self.l
+        if not self.bound:
+            self.bind()
+        conn = self.conn
 
         value = []
 
@@ -136,7 +148,7 @@ class UserResource(Resource):
 
         lc = SimplePagedResultsControl(True, size=size, cookie='')
         while True:
-            msgid = l.search_ext(
+            msgid = conn.search_ext(
                 self.baseDN,
                 self.searchScope,
                 searchFilter,
@@ -144,7 +156,7 @@ class UserResource(Resource):
                 serverctrls=[lc]
             )
 
-            rtype, rdata, rmsgid, serverctrls = l.result3(msgid, all=1)
+            rtype, rdata, rmsgid, serverctrls = conn.result3(msgid, all=1)
 
             for _, attrs in rdata:
                 count += 1
@@ -1,12 +1,18 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 import errno
+import faulthandler
+import gc
 import gettext
 import glob
+import importlib
 import io
 import logging
 import multiprocessing
+import multiprocessing.connection
 import os
 import os.path
+import pkgutil
+import select
 import signal
 import socket
 import sys
@@ -16,10 +22,17 @@ from functools import partial
 
 import bjoern
 import falcon
+import pytz
 
 import grapi.api.v1 as grapi
+from grapi.api.v1.timezone import _windows_to_iana
+from grapi.api.v1.timing import Timing
 from grapi.mfr.msgfmt import Msgfmt, PoSyntaxError
-from grapi.mfr.utils import parse_accept_language
+from grapi.mfr import threaded
+from grapi.mfr.control import ControlSocket
+from grapi.mfr.profiler import SamplingProfiler
+from grapi.mfr.scoreboard import Scoreboard, publish_stats, track
+from grapi.mfr.utils import language_resolver
 
 try:
     import ujson  # noqa: F401
@@ -29,7 +42,8 @@ except ImportError:
 
 try:
     from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry,
-                                   Counter, Gauge, Summary, generate_latest)
+                                   Counter, Gauge, Histogram, generate_latest)
+    from prometheus_client.core import GaugeMetricFamily
     from prometheus_client import multiprocess as prometheus_multiprocess
     PROMETHEUS = True
 except ImportError:
@@ -47,24 +61,6 @@ try:
 except ImportError:
     COLORLOG = False
 
-WITH_YAPPI = False
-WITH_CPROFILE = False
-PROFILE_MODE = os.getenv('PROFILE_MODE', None)  # One in [full, request]
-PROFILE_DIR = os.getenv('PROFILE_DIR')
-if PROFILE_DIR:
-    if os.path.exists(PROFILE_DIR):
-        if PROFILE_MODE == 'request':
-            print("Writing request profiles to '{}' ...".format(PROFILE_DIR))
-            import cProfile
-            WITH_CPROFILE = True
-        else:
-            print("Writing profiles (on exit) to '{}' ...".format(PROFILE_DIR))
-            import yappi
-            WITH_YAPPI = True
-    else:
-        print("PROFILE_DIR '{}' is invalid, not enabling profiling".format(PROFILE_DIR))
-        PROFILE_DIR = None
-
 """
 Master Fleet Runner
 
@@ -72,14 +68,55 @@ Instantiates the specified number of Bjoern WSGI server processes,
 each taking orders on their own unix socket and passing requests to
 the respective WSGI app (rest, notify or metrics).
 
+With shared sockets, the master binds one rest and one notify socket before
+forking and all workers of a kind accept from the same socket, so idle workers
+pick up the next connection.
+
+The master supervises its workers. A worker which dies is respawned, workers
+can be recycled after a number of requests or when their memory grows too
+large. Recycling is done one worker at a time and lets in-flight requests
+finish before the old process exits. With shared sockets, the number of rest
+workers can be scaled between a minimum and maximum based on how many of them
+are busy. Workers serve requests with bjoern one at a time, or alternatively
+with a bounded pool of threads each. Workers publish the label, start time
+and phase of their requests in the scoreboard, so the master can report
+requests which exceed a time budget.
+
+With a profile directory, SIGUSR1 toggles a sampling profiler in a worker, or
+in all workers when sent to the master. Stopping it writes collapsed stacks
+and a pstats file to the profile directory.
+
+The master can serve a control socket, which reports the state of all workers
+and accepts commands to profile or drain workers.
+
 """
 
+DRAIN_TIMEOUT = 30  # Seconds to wait for in-flight requests on worker exit.
+SUPERVISE_INTERVAL = 1  # Seconds between supervisor checks.
+RESPAWN_MIN_UPTIME = 5  # Workers exiting sooner are counted as failing.
+RESPAWN_MAX_FAILURES = 5  # Consecutive failures before giving up.
+AUTOSCALE_UP_RATIO = 0.8  # Share of busy rest workers to add a worker.
+AUTOSCALE_UP_DELAY = 3  # Seconds the fleet has to stay busy before adding.
+AUTOSCALE_DOWN_RATIO = 0.25  # Share of busy rest workers to retire a worker.
+AUTOSCALE_DOWN_DELAY = 60  # Seconds the fleet has to stay idle before retiring.
+
 # metrics
+REQUEST_TIME_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
 if PROMETHEUS:
-    REQUEST_TIME = Summary('kopano_mfr_request_processing_seconds', 'Time spent processing request', ['method', 'endpoint'])
+    REQUEST_TIME = Histogram('kopano_mfr_request_processing_seconds', 'Time spent processing request', ['method', 'endpoint'], buckets=REQUEST_TIME_BUCKETS)
+    PHASE_TIME = Histogram('kopano_mfr_request_phase_seconds', 'Time spent in phases of processing request', ['method', 'endpoint', 'phase'], buckets=REQUEST_TIME_BUCKETS)
     EXCEPTION_COUNT = Counter('kopano_mfr_total_unhandled_exceptions', 'Total number of unhandled exceptions')
     MEMORY_GAUGE = Gauge('kopano_mfr_virtual_memory_bytes', 'Virtual memory size in bytes', ['worker'])
+    RSS_GAUGE = Gauge('kopano_mfr_resident_memory_bytes', 'Resident memory size in bytes', ['worker'])
+    PSS_GAUGE = Gauge('kopano_mfr_proportional_memory_bytes', 'Proportional set size in bytes, shared memory divided among its users', ['worker'])
+    USS_GAUGE = Gauge('kopano_mfr_unique_memory_bytes', 'Unique set size in bytes, memory private to the process', ['worker'])
     CPUTIME_GAUGE = Gauge('kopano_mfr_cpu_seconds_total', 'Total user and system CPU time spent in seconds', ['worker'])
+    FDS_GAUGE = Gauge('kopano_mfr_open_fds', 'Number of open file descriptors', ['worker'])
+    VOLUNTARY_CTXT_GAUGE = Gauge('kopano_mfr_voluntary_context_switches_total', 'Total number of voluntary context switches', ['worker'])
+    NONVOLUNTARY_CTXT_GAUGE = Gauge('kopano_mfr_nonvoluntary_context_switches_total', 'Total number of involuntary context switches', ['worker'])
+    INFLIGHT_GAUGE = Gauge('kopano_mfr_inflight_requests', 'Number of requests in progress', ['worker'])
+    QUEUED_GAUGE = Gauge('kopano_mfr_queued_requests', 'Number of accepted requests waiting for a thread', ['worker'])
+    STUCK_REQUEST_COUNT = Counter('kopano_mfr_total_stuck_requests', 'Total number of requests which exceeded the request budget', ['endpoint', 'phase'])
 
 
 def error_handler(ex, req, resp, params, with_metrics):
@@ -98,6 +135,7 @@ nullTranslations = gettext.NullTranslations(None)
 class FalconLabel:
     def __init__(self, translations=None):
         self.translations = translations
+        self.resolve_language = language_resolver(translations or {})
 
     def get_language(self, lang):
         return self.translations.get(lang, nullTranslations.gettext)
@@ -121,47 +159,119 @@ class FalconLabel:
         # - auto fallback to en-gb
 
         # HTTP ACCEPT-LANGUAGE
-        accept_lang = req.headers.get('ACCEPT-LANGUAGE')
+        accept_lang = req.get_header('ACCEPT-LANGUAGE')
         # logging.debug("requesting accept-lang '%s'", accept_lang)
         if accept_lang:
-            for lang, _ in parse_accept_language(accept_lang):
-                translation = self.translations.get(lang)
-                if translation:
-                    req.context.i18n = translation
-                    # logging.debug("using translation '%s'", lang)
-                    return
+            translation = self.resolve_language(accept_lang)
+            if translation:
+                req.context.i18n = translation
+                return
 
         req.context.i18n = nullTranslations
 
 
+class FalconWatchdog:
+    # Publishes label and phase of the request in the worker scoreboard.
+    def process_resource(self, req, resp, resource, params):
+        request = req.env.get('grapi.mfr.request')
+        if request is not None:
+            request.set('%s %s' % (req.method, req.context.label), 'resource')
+
+    def process_response(self, req, resp, resource, req_succeeded=True):
+        request = req.env.get('grapi.mfr.request')
+        if request is not None:
+            request.set(phase='response')
+
+
+def metrics_label(req):
+    label = req.context.get("label")
+    if label:
+        deltaid = req.context.get('deltaid')
+        if deltaid:
+            label = label.replace(deltaid, 'delta')
+    return label
+
+
 class FalconMetrics:
     def process_request(self, req, resp):
         req.context.start_time = time.time()
 
     def process_response(self, req, resp, resource, req_succeeded=True):
-        label = req.context.get("label")
+        label = metrics_label(req)
         if label:
             t = time.time() - req.context.start_time
-            deltaid = req.context.get('deltaid')
-            if deltaid:
-                label = label.replace(deltaid, 'delta')
             REQUEST_TIME.labels(req.method, label).observe(t)
 
 
-class FalconRequestProfiler:
-    def process_request(self, req, resp):
-        profile = cProfile.Profile()
-        profile.enable()
-        req.context.profile = profile
+def _timed_stream(stream, timing, done):
+    try:
+        iterator = iter(stream)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                timing.add('stream', time.perf_counter() - start)
+            yield chunk
+    finally:
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+        done()
+
+
+class FalconPhases:
+    # Times the phases of requests, must be the first middleware. Phases are
+    # middleware, session, responder and stream (iterating resp.stream).
+    def __init__(self, with_metrics=False, slow_request_threshold=0):
+        self.with_metrics = with_metrics
+        self.slow_request_threshold = slow_request_threshold
 
-    def process_resource(self, req, resp, resource, params):
-        pass
+    def process_request(self, req, resp):
+        req.context.timing = Timing()
 
     def process_response(self, req, resp, resource, req_succeeded=True):
-        profile = req.context.profile
-        profile.disable()
-        label = req.context.label
-        profile.dump_stats('{}/{}.prof'.format(PROFILE_DIR, label))
+        timing = req.context.timing
+        timing.add('middleware', time.perf_counter() - timing.start - sum(timing.phases.values()))
+
+        done = partial(self.done, req.method, metrics_label(req), req.path, timing)
+        stream = resp.stream
+        if stream is not None and not hasattr(stream, 'read'):
+            resp.stream = _timed_stream(stream, timing, done)
+        else:
+            done()
+
+    def done(self, method, label, path, timing):
+        if self.with_metrics and label:
+            for phase, duration in timing.phases.items():
+                PHASE_TIME.labels(method, label, phase).observe(duration)
+
+        if self.slow_request_threshold:
+            total = time.perf_counter() - timing.start
+            if total >= self.slow_request_threshold:
+                logging.warning('slow request %s %s took %.3fs (%s)', method, path, total, ', '.join('%s=%.3fs' % item for item in sorted(timing.phases.items())))
+
+
+def read_smaps_rollup(pid):
+    # Returns the memory totals of the process in bytes, by field name.
+    totals = {}
+    with open('/proc/{}/smaps_rollup'.format(pid), 'rb') as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == b'kB':
+                totals[parts[0][:-1].decode('ascii')] = int(parts[1]) * 1024
+    return totals
+
+
+def read_status(pid):
+    status = {}
+    with open('/proc/{}/status'.format(pid), 'rb') as f:
+        for line in f:
+            key, _, value = line.partition(b':')
+            status[key.decode('ascii')] = value.strip()
+    return status
 
 
 def collect_worker_metrics(workers):
@@ -172,20 +282,90 @@ def collect_worker_metrics(workers):
         pass
 
     for worker in workers:
-        name, pid = worker
-        with open('/proc/{}/stat'.format(pid), 'rb') as stat:
-            parts = stat.read().split()
-            MEMORY_GAUGE.labels(name).set(float(parts[23]))
-            utime = float(parts[13]) / ticks
-            stime = float(parts[14]) / ticks
+        name, pid, status = worker
+        # Sources can be missing, on older kernels or when the worker
+        # exited after the scoreboard was read.
+        try:
+            with open('/proc/{}/stat'.format(pid), 'rb') as stat:
+                data = stat.read()
+        except OSError:
+            pass
+        else:
+            # Skip past the process name, it can contain spaces.
+            parts = data[data.rindex(b')') + 2:].split()
+            MEMORY_GAUGE.labels(name).set(float(parts[20]))
+            utime = float(parts[11]) / ticks
+            stime = float(parts[12]) / ticks
             CPUTIME_GAUGE.labels(name).set(utime + stime)
+        try:
+            smaps = read_smaps_rollup(pid)
+        except OSError:
+            pass
+        else:
+            RSS_GAUGE.labels(name).set(float(smaps.get('Rss', 0)))
+            PSS_GAUGE.labels(name).set(float(smaps.get('Pss', 0)))
+            USS_GAUGE.labels(name).set(float(smaps.get('Private_Clean', 0) + smaps.get('Private_Dirty', 0)))
+        try:
+            proc_status = read_status(pid)
+        except OSError:
+            pass
+        else:
+            VOLUNTARY_CTXT_GAUGE.labels(name).set(float(proc_status.get('voluntary_ctxt_switches', 0)))
+            NONVOLUNTARY_CTXT_GAUGE.labels(name).set(float(proc_status.get('nonvoluntary_ctxt_switches', 0)))
+        try:
+            fds = len(os.listdir('/proc/{}/fd'.format(pid)))
+        except OSError:
+            pass
+        else:
+            FDS_GAUGE.labels(name).set(fds)
+        if status is not None:
+            INFLIGHT_GAUGE.labels(name).set(status.inflight)
+            QUEUED_GAUGE.labels(name).set(status.queued)
+
+
+def get_rss(pid):
+    try:
+        with open('/proc/{}/statm'.format(pid), 'rb') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def get_uss(pid):
+    # Unique set size, the memory which is private to the process.
+    try:
+        smaps = read_smaps_rollup(pid)
+    except (OSError, ValueError):
+        return 0
+    return smaps.get('Private_Clean', 0) + smaps.get('Private_Dirty', 0)
+
+
+class StuckRequestsCollector:
+    def __init__(self, board, budget):
+        self.board = board
+        self.budget = budget
+
+    def collect(self):
+        gauge = GaugeMetricFamily('kopano_mfr_stuck_request_seconds', 'Age of requests in progress which exceed the request budget', labels=['worker', 'endpoint', 'phase'])
+        if self.budget:
+            now = time.time()
+            for status in self.board.active():
+                for request in status.current:
+                    started = request.started
+                    if started and now - started > self.budget:
+                        gauge.add_metric([status.name, request.label.decode('utf-8', 'replace'), request.phase.decode('ascii')], now - started)
+        yield gauge
 
 
 # Expose metrics.
-def metrics_app(workers, environ, start_response):
+def metrics_app(board, master_pid, budget, environ, start_response):
+    workers = [(status.name, status.pid, status) for status in board.active() if status.kind != b'metrics']
+    # Include master process.
+    workers.append(('master', master_pid, None))
     collect_worker_metrics(workers)
     registry = CollectorRegistry()
     prometheus_multiprocess.MultiProcessCollector(registry)
+    registry.register(StuckRequestsCollector(board, budget))
     data = generate_latest(registry)
     status = '200 OK'
     response_headers = [
@@ -197,12 +377,16 @@ def metrics_app(workers, environ, start_response):
 
 
 class Runner:
-    def __init__(self, queue, worker, name, process_name, n):
-        self.queue = queue
+    def __init__(self, exit_event, worker, name, process_name, n, status=None, profile_dir=None):
+        self.exit = exit_event
         self.worker = worker
         self.name = name
         self.process_name = process_name
         self.n = n
+        self.status = status
+        self.profile_dir = profile_dir
+        self.profiler = None
+        self.stop_accepting = None
 
     def run(self, *args, **kwargs):
         signal.signal(signal.SIGTERM, lambda *args: 0)
@@ -211,13 +395,21 @@ class Runner:
         if SETPROCTITLE:
             setproctitle.setproctitle('%s %s %d' % (self.process_name, self.name, self.n))
 
-        if WITH_YAPPI and PROFILE_DIR:
-            yappi.start(builtins=False, profile_threads=True)
+        # Dump the stacks of all threads when the watchdog asks for it.
+        faulthandler.register(signal.SIGUSR2, all_threads=True)
+
+        if self.profile_dir:
+            self.profiler = SamplingProfiler()
+            signal.signal(signal.SIGUSR1, self.toggle_profiler)
+
+        if self.status is not None:
+            self.status.started = time.time()
 
         # Start in thread, to allow proper termination, without killing the process.
         thread = threading.Thread(target=self.start, name='%s%d' % (self.name, self.n), args=args, kwargs=kwargs, daemon=True)
         thread.start()
-        self.queue.join()
+        self.exit.wait()
+        self.drain()
         logging.debug('shutdown %s %d worker with pid %s is complete', self.name, self.n, os.getpid())
         self.stop()
         # NOTE(longsleep): We do not wait on the thread. The process will
@@ -226,17 +418,90 @@ class Runner:
 
     def start(self, *args, **kwargs):
         try:
-            self.worker(*args, **kwargs)
+            self.worker(*args, status=self.status, listening=self.listening, **kwargs)
         except Exception:  # pylint: disable=broad-except
             logging.critical('error in %s %d worker with pid %s', self.name, self.n, os.getpid(), exc_info=True)
-            self.queue.task_done()  # Mark queue as done, to indicate exit.
+            self.exit.set()  # Exit this worker, the master respawns it.
+
+    def listening(self, stop_accepting):
+        # Called by the server of the worker once it listens, with a function
+        # which stops accepting connections and returns whether it is idle.
+        self.stop_accepting = stop_accepting
+
+    def drain(self):
+        # Stop accepting connections first, so new ones are left to the other
+        # workers or the replacement, then give the connections which were
+        # already accepted a chance to complete.
+        if self.status is None:
+            return
+        idle = None
+        if self.stop_accepting is not None:
+            try:
+                idle = self.stop_accepting()
+            except Exception:  # pylint: disable=broad-except
+                logging.warning('failed to stop accepting in %s %d worker', self.name, self.n, exc_info=True)
+        if idle is None:
+            idle = lambda: self.status.inflight == 0  # noqa: E731
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while not idle() and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+    def toggle_profiler(self, *args):
+        if not self.profiler.running:
+            self.profiler.start()
+            logging.info('started profiling %s %d worker', self.name, self.n)
+        else:
+            self.profiler.stop()
+            self.dump_profile()
+
+    def dump_profile(self):
+        try:
+            path = self.profiler.dump(self.profile_dir, '%s%d' % (self.name, self.n))
+        except OSError as err:
+            logging.error('failed to write profile of %s %d worker, error: %s', self.name, self.n, err)
+        else:
+            logging.info('dumped profile of %s %d worker (%d samples) to %s.{collapsed,prof}', self.name, self.n, self.profiler.count, path)
 
     def stop(self, *args, **kwargs):
-        if WITH_YAPPI and PROFILE_DIR:
-            yappi.stop()
-            stats = yappi.convert2pstats(yappi.get_func_stats().get())
-            stats.dump_stats('{}/{}{}.prof'.format(PROFILE_DIR, self.name, self.n))
-            logging.info("dumped profile of %s %d worker", self.name, self.n)
+        if self.profiler is not None and self.profiler.running:
+            self.profiler.stop()
+            self.dump_profile()
+
+
+class Worker:
+    """Supervised fleet member, tracks the current process which serves it."""
+
+    def __init__(self, kind, n, target, args, socket_path=None):
+        self.kind = kind
+        self.n = n
+        self.name = '{}{}'.format(kind, n)
+        self.target = target
+        self.args = args
+        self.socket_path = socket_path  # Per worker socket, removed before respawn.
+
+        self.process = None
+        self.exit = None
+        self.slot = None
+        self.started = 0
+        self.failures = 0
+
+
+class Retiree:
+    """Process of a worker which is being recycled."""
+
+    def __init__(self, worker, respawn):
+        self.worker = worker
+        self.respawn = respawn
+        self.process = worker.process
+        self.exit = worker.exit
+        self.slot = worker.slot
+        self.successor = None
+        # Covers waiting for the successor and draining in-flight requests.
+        self.deadline = time.monotonic() + 2 * DRAIN_TIMEOUT + 5
+
+        worker.process = None
+        worker.exit = None
+        worker.slot = None
 
 
 class Server:
@@ -252,12 +517,13 @@ class Server:
 
         return sock
 
-    def run_rest(self, socket_path, n, options):
-        middleware = [FalconLabel(self.translations)]
+    def run_rest(self, socket_path, n, options, sock=None, status=None, listening=None):
+        middleware = []
+        if options.with_metrics or options.slow_request_threshold:
+            middleware.append(FalconPhases(options.with_metrics, options.slow_request_threshold))
+        middleware.extend([FalconLabel(self.translations), FalconWatchdog()])
         if options.with_metrics:
             middleware.append(FalconMetrics())
-        if WITH_CPROFILE and PROFILE_DIR:
-            middleware.append(FalconRequestProfiler())
         backends = options.backends.split(',')
         app = grapi.API(
             options=options,
@@ -273,18 +539,28 @@ class Server:
         app.add_error_handler(Exception, handler)
         app.initialize_backends_error_handlers()
 
-        unix_socket_path = os.path.join(socket_path, 'rest%d.sock' % n)
+        if sock is None:
+            unix_socket_path = os.path.join(socket_path, 'rest%d.sock' % n)
+            sock = self.create_socket_and_listen(unix_socket_path)
+        else:
+            unix_socket_path = sock.getsockname()
+
+        if status is not None:
+            publish_stats(status, app.backends_stats)
+            app = track(app, status)
+            status.ready = True
 
         # Run server, this blocks.
         logging.debug('starting rest %d worker (unix:%s) with pid %d', n, unix_socket_path, os.getpid())
-        bjoern.server_run(self.create_socket_and_listen(unix_socket_path), app)
+        self.server_run(sock, app, options, status, listening)
 
-    def run_notify(self, socket_path, n, options):
-        middleware = [FalconLabel(self.translations)]
+    def run_notify(self, socket_path, n, options, sock=None, status=None, listening=None):
+        middleware = []
+        if options.with_metrics or options.slow_request_threshold:
+            middleware.append(FalconPhases(options.with_metrics, options.slow_request_threshold))
+        middleware.extend([FalconLabel(self.translations), FalconWatchdog()])
         if options.with_metrics:
             middleware.append(FalconMetrics())
-        if PROFILE_DIR and PROFILE_MODE == 'request':
-            middleware.append(FalconRequestProfiler())
         backends = options.backends.split(',')
         app = grapi.API(
             options=options,
@@ -300,20 +576,44 @@ class Server:
         app.add_error_handler(Exception, handler)
         app.initialize_backends_error_handlers()
 
-        unix_socket_path = os.path.join(socket_path, 'notify%d.sock' % n)
+        if sock is None:
+            unix_socket_path = os.path.join(socket_path, 'notify%d.sock' % n)
+            sock = self.create_socket_and_listen(unix_socket_path)
+        else:
+            unix_socket_path = sock.getsockname()
+
+        if status is not None:
+            publish_stats(status, app.backends_stats)
+            app = track(app, status)
+            status.ready = True
 
         # Run server, this blocks.
         logging.debug('starting notify %d worker (unix:%s) with pid %d', n, unix_socket_path, os.getpid())
-        bjoern.server_run(self.create_socket_and_listen(unix_socket_path), app)
+        self.server_run(sock, app, options, status, listening)
 
-    def run_metrics(self, socket_path, options, workers):
+    def server_run(self, sock, app, options, status=None, listening=None):
+        if options.worker_engine == 'threaded':
+            threaded.server_run(sock, app, options.worker_threads, status, listening)
+        else:
+            if listening is not None:
+                listening(partial(self.bjoern_stop_accepting, threading.current_thread()))
+            bjoern.server_run(sock, app)
+
+    def bjoern_stop_accepting(self, thread):
+        # On SIGINT, bjoern stops its accept watcher and its loop ends once
+        # the connections it accepted are done. The interrupt it raises when
+        # its loop ends goes to the ignoring SIGINT handler of the Runner.
+        os.kill(os.getpid(), signal.SIGINT)
+        return lambda: not thread.is_alive()
+
+    def run_metrics(self, socket_path, options, board, master_pid, status=None, listening=None):
         address = options.metrics_listen
 
         address_parts = address.split(':')
 
         # Run server, this blocks.
         logging.debug('starting metrics worker (%s) with pid %d', address, os.getpid())
-        bjoern.run(partial(metrics_app, workers), address_parts[0], int(address_parts[1]))
+        bjoern.run(partial(metrics_app, board, master_pid, options.request_budget), address_parts[0], int(address_parts[1]))
 
     def init_logging(self, log_level, log_timestamp=True):
         numeric_level = getattr(logging, log_level.upper(), None)
@@ -340,7 +640,7 @@ class Server:
         # Send all warnings to logging.
         logging.captureWarnings(True)
 
-    def get_translations(self, translations_path):
+    def get_translations(self, translations_path, cache_path=None):
         translations = {
             'en': gettext.NullTranslations(None),  # Always add default (built-in language en).
         }
@@ -357,17 +657,42 @@ class Server:
                 logging.error("invalid po file with unsupported language '%s' found, skipping", language)
                 continue
 
-            try:
-                msgfmt = Msgfmt(open(pofile, 'rb'))
-            except IOError:
-                logging.warning("error when opening po file '%s'", pofile)
+            mo = None
+            mofile = None
+            if cache_path:
+                # Compiled catalogs are cached with the mtime of their source.
+                mofile = os.path.join(cache_path, language + '.mo')
+                try:
+                    if os.stat(mofile).st_mtime_ns == entry.stat().st_mtime_ns:
+                        with open(mofile, 'rb') as f:
+                            mo = f.read()
+                except OSError:
+                    pass
+
+            if mo is None:
+                try:
+                    with open(pofile, 'rb') as f:
+                        mo = Msgfmt(f).get()
+                except IOError:
+                    logging.warning("error when opening po file '%s'", pofile)
+                    continue
+                except PoSyntaxError:
+                    logging.warning("unable to parse po file '%s'", pofile)
+                    continue
+
+                if mofile:
+                    try:
+                        with open(mofile + '.tmp', 'wb') as f:
+                            f.write(mo)
+                        os.utime(mofile + '.tmp', ns=(entry.stat().st_atime_ns, entry.stat().st_mtime_ns))
+                        os.replace(mofile + '.tmp', mofile)
+                    except OSError as err:
+                        logging.warning("failed to write translations cache '%s', error: %s", mofile, err)
 
             try:
-                gnutranslation = gettext.GNUTranslations(io.BytesIO(msgfmt.get()))
-            except PoSyntaxError:
-                logging.warning("unable to parse po file '%s'", pofile)
-
-            translations[language] = gnutranslation
+                translations[language] = gettext.GNUTranslations(io.BytesIO(mo))
+            except (OSError, UnicodeDecodeError):
+                logging.warning("unable to load compiled catalog for '%s'", pofile)
 
         return translations
 
@@ -378,6 +703,8 @@ class Server:
 
         # Initialize logging, keep this at the beginning!
         self.init_logging(args.log_level)
+        self.startup = time.monotonic()
+        self.started = time.time()
 
         for f in glob.glob(os.path.join(args.socket_path, 'rest*.sock')):
             os.unlink(f)
@@ -385,7 +712,7 @@ class Server:
             os.unlink(f)
 
         # Initialize translations
-        self.translations = self.get_translations(args.translations_path)
+        self.translations = self.get_translations(args.translations_path, args.translations_cache_path)
 
         if not self.translations:
             logging.warning('no po files found, no translations will be available')
@@ -398,22 +725,47 @@ class Server:
 
         logging.info('starting kopano-mfr')
 
-        # Fake exit queue.
-        queue = multiprocessing.JoinableQueue(1)
-        queue.put(True)
+        if args.preload:
+            self.preload(args)
+
+        # Shared sockets are bound by the master, so all workers of a kind
+        # inherit the same listening socket and accept from it.
+        rest_sock = None
+        notify_sock = None
+        if args.shared_sockets:
+            rest_sock = self.create_socket_and_listen(os.path.join(args.socket_path, 'rest.sock'))
+            notify_sock = self.create_socket_and_listen(os.path.join(args.socket_path, 'notify.sock'))
+
+        rest_workers = args.rest_workers if args.rest_workers is not None else args.workers
+        notify_workers = args.notify_workers if args.notify_workers is not None else args.workers
+
+        self.args = args
+        self.retiring = []
+        self.workers = []
+        self.unspawned = []  # Workers waiting for a free scoreboard slot.
+        for n in range(rest_workers):
+            self.workers.append(self.rest_worker(n, rest_sock))
+        for n in range(notify_workers):
+            notify_socket_path = None if notify_sock else os.path.join(args.socket_path, 'notify%d.sock' % n)
+            self.workers.append(Worker('notify', n, self.run_notify, (args.socket_path, n, args, notify_sock), notify_socket_path))
+
+        self.rest_sock = rest_sock
+        self.rest_workers_min = rest_workers
+        self.rest_workers_max = rest_workers
+        if args.max_rest_workers > rest_workers:
+            if rest_sock:
+                self.rest_workers_max = args.max_rest_workers
+            else:
+                logging.error('autoscaling of rest workers requires shared sockets, not scaling beyond %d rest workers', rest_workers)
+        self.scale_busy_since = None
+        self.scale_idle_since = None
 
-        workers = []
-        for n in range(args.workers):
-            rest_runner = Runner(queue, self.run_rest, 'rest', args.process_name, n)
-            rest_process = multiprocessing.Process(target=rest_runner.run, name='rest{}'.format(n), args=(args.socket_path, n, args))
-            workers.append(rest_process)
-            notify_runner = Runner(queue, self.run_notify, 'notify', args.process_name, n)
-            notify_process = multiprocessing.Process(target=notify_runner.run, name='notify{}'.format(n), args=(args.socket_path, n, args))
-            workers.append(notify_process)
-
-        for worker in workers:
-            worker.daemon = True
-            worker.start()
+        # Each worker can have a replacement running while it is recycled, plus
+        # the metrics process.
+        self.board = Scoreboard(2 * (self.rest_workers_max + notify_workers) + 1)
+
+        for worker in self.workers:
+            self.spawn(worker)
 
         if args.insecure:
             logging.warning('insecure mode - TLS client connections are susceptible to man-in-the-middle attacks and safety checks are off - this is not suitable for production use')
@@ -424,15 +776,10 @@ class Server:
         if args.with_metrics:
             if PROMETHEUS:
                 if os.environ.get('prometheus_multiproc_dir') or os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
-                    # Spawn the metrics process later, so we can pass along worker name and pids.
-                    monitor_workers = [(worker.name, worker.pid) for worker in workers]
-                    # Include master process.
-                    monitor_workers.append(('master', os.getpid()))
-                    metrics_runner = Runner(queue, self.run_metrics, 'metrics', args.process_name, 0)
-                    metrics_process = multiprocessing.Process(target=metrics_runner.run, args=(args.socket_path, args, monitor_workers))
-                    metrics_process.daemon = True
-                    metrics_process.start()
-                    workers.append(metrics_process)
+                    # The metrics process finds the worker pids in the scoreboard.
+                    metrics_worker = Worker('metrics', 0, self.run_metrics, (args.socket_path, args, self.board, os.getpid()))
+                    self.workers.append(metrics_worker)
+                    self.spawn(metrics_worker)
                 else:
                     logging.error('please export "prometheus_multiproc_dir"')
                     self.running = False
@@ -440,77 +787,414 @@ class Server:
                 logging.error('please install prometheus client python bindings')
                 self.running = False
 
-        signal.signal(signal.SIGCHLD, self.sigchld)
         signal.signal(signal.SIGTERM, self.sigterm)
+        if args.profile_dir:
+            signal.signal(signal.SIGUSR1, self.sigusr1)
+
+        control = None
+        if args.control_socket:
+            control = ControlSocket(args.control_socket, self.control)
 
         try:
             while self.running:
-                signal.pause()
+                self.supervise()
+                if control is None:
+                    time.sleep(SUPERVISE_INTERVAL)
+                elif select.select([control], [], [], SUPERVISE_INTERVAL)[0]:
+                    control.handle()
         except KeyboardInterrupt:
             self.running = False
             logging.info('keyboard interrupt')
 
         logging.info('starting shutdown')
 
-        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        if control is not None:
+            control.close()
+
+        processes = [worker.process for worker in self.workers if worker.process]
+        processes.extend(retiree.process for retiree in self.retiring)
 
         if not self.abnormal_shutdown:
-            # Flush queue, to tell workers to cleanly exit.
-            queue.get()
-            try:
-                queue.task_done()
-            except ValueError:
-                # NOTE(longsleep): If a process encountered an error taks_done() was
-                # already called, thus it errors which is ok and can be ignored.
-                pass
+            # Tell workers to cleanly exit.
+            for worker in self.workers:
+                if worker.exit:
+                    worker.exit.set()
+            for retiree in self.retiring:
+                retiree.exit.set()
 
         # Wait for workers to exit.
         deadline = time.monotonic() + 5
         done = []
         while deadline > time.monotonic():
-            ready = multiprocessing.connection.wait([worker.sentinel for worker in workers if worker.sentinel not in done], timeout=1)
+            ready = multiprocessing.connection.wait([process.sentinel for process in processes if process.sentinel not in done], timeout=1)
             done.extend(ready)
-            if len(done) == len(workers):
+            if len(done) == len(processes):
                 break
 
         # Kill off workers which did not exit.
-        kill = len(done) != len(workers)
-        for worker in workers:
-            if kill and worker.is_alive():
+        kill = len(done) != len(processes)
+        for process in processes:
+            if kill and process.is_alive():
                 if self.abnormal_shutdown:
-                    logging.critical('killing worker: %d', worker.pid)
-                    os.kill(worker.pid, signal.SIGKILL)
+                    logging.critical('killing worker: %d', process.pid)
+                    os.kill(process.pid, signal.SIGKILL)
                 else:
-                    logging.warning('terminating worker: %d', worker.pid)
-                    worker.terminate()
-            if os.environ.get('prometheus_multiproc_dir') and args.with_metrics and PROMETHEUS:
-                prometheus_multiprocess.mark_process_dead(worker.pid)
-            worker.join()
+                    logging.warning('terminating worker: %d', process.pid)
+                    process.terminate()
+            self.mark_process_dead(process.pid)
+            process.join()
+
+        for sock in (rest_sock, notify_sock):
+            if sock is not None:
+                sock.close()
 
         # Cleanup potentially left over sockets.
         sockets = []
-        for n in range(args.workers):
+        if args.shared_sockets:
+            sockets.append('rest.sock')
+            sockets.append('notify.sock')
+        for n in range(rest_workers):
             sockets.append('rest%d.sock' % n)
-        for n in range(args.workers):
+        for n in range(notify_workers):
             sockets.append('notify%d.sock' % n)
         for socket in sockets:  # noqa: F402
-            try:
-                unix_socket = os.path.join(args.socket_path, socket)
-                os.unlink(unix_socket)
-            except OSError as err:
-                if err.errno != errno.ENOENT:
-                    logging.warning('failed to remove socket %s on shutdown, error: %s', unix_socket, err)
+            self.unlink_socket(os.path.join(args.socket_path, socket))
 
         logging.info('shutdown complete')
 
-    def sigchld(self, *args):
-        if self.running:
+    def preload(self, args):
+        # Import and warm everything which is safe to share with forked
+        # workers, so their pages are shared copy-on-write. Backends are only
+        # imported, their initialize hook starts threads and runs per worker.
+        started = time.monotonic()
+        for name in args.backends.split(','):
+            grapi.API.import_backend(name)
+        schema = importlib.import_module('grapi.api.v1.schema')
+        for module in pkgutil.iter_modules(schema.__path__):
+            importlib.import_module('grapi.api.v1.schema.' + module.name)
+        for tz in set(_windows_to_iana.values()):
             try:
-                logging.critical('child was terminated unexpectedly, initiating abnormal shutdown')
-            except Exception:  # pylint: disable=broad-except
+                pytz.timezone(tz)
+            except pytz.UnknownTimeZoneError:
                 pass
-            self.running = False
-            self.abnormal_shutdown = True
+
+        # Move everything loaded so far out of the collector's view, so
+        # collections in the workers do not touch (and thus copy) the pages.
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        logging.info('preloaded application in %.3fs', time.monotonic() - started)
+
+    def rest_worker(self, n, sock):
+        socket_path = None if sock else os.path.join(self.args.socket_path, 'rest%d.sock' % n)
+        return Worker('rest', n, self.run_rest, (self.args.socket_path, n, self.args, sock), socket_path)
+
+    def spawn(self, worker):
+        if worker.socket_path:
+            self.unlink_socket(worker.socket_path)
+
+        slot = self.board.acquire(worker.kind, worker.n)
+        if slot is None:
+            # Slots are freed as retiring processes are reaped.
+            logging.error('no scoreboard slot left to start %s worker, retrying', worker.name)
+            if worker not in self.unspawned:
+                self.unspawned.append(worker)
+            return False
+        exit_event = multiprocessing.Event()
+        runner = Runner(exit_event, worker.target, worker.kind, self.args.process_name, worker.n, self.board[slot], self.args.profile_dir)
+        process = multiprocessing.Process(target=runner.run, name=worker.name, args=worker.args)
+        process.daemon = True
+        process.start()
+        self.board[slot].pid = process.pid
+
+        worker.process = process
+        worker.exit = exit_event
+        worker.slot = slot
+        worker.started = time.monotonic()
+        return True
+
+    def retire(self, worker, handover=False):
+        # Let the current process of the worker exit once its in-flight
+        # requests are done. With handover, the replacement is started right
+        # away and the old process is only told to exit once the replacement
+        # is ready, otherwise the replacement is started after the old
+        # process is gone.
+        retiree = Retiree(worker, respawn=not handover)
+        logging.info('recycling %s worker with pid %d', worker.name, retiree.process.pid)
+        if handover and self.spawn(worker):
+            retiree.successor = worker.slot
+        else:
+            retiree.exit.set()
+        self.retiring.append(retiree)
+
+    def reap(self, process, slot):
+        process.join()
+        self.mark_process_dead(process.pid)
+        self.board.release(slot)
+
+    def supervise(self):
+        now = time.monotonic()
+
+        for retiree in list(self.retiring):
+            process = retiree.process
+            if not retiree.exit.is_set():
+                if self.board[retiree.successor].ready or now > retiree.deadline - DRAIN_TIMEOUT:
+                    retiree.exit.set()
+                continue
+            if process.is_alive():
+                if now > retiree.deadline:
+                    logging.warning('killing %s worker with pid %d which did not exit in time', retiree.worker.name, process.pid)
+                    os.kill(process.pid, signal.SIGKILL)
+                continue
+            self.retiring.remove(retiree)
+            self.reap(process, retiree.slot)
+            if retiree.respawn:
+                self.spawn(retiree.worker)
+
+        for worker in list(self.unspawned):
+            self.unspawned.remove(worker)
+            if worker in self.workers:
+                self.spawn(worker)
+
+        for worker in self.workers:
+            if worker.process is None or worker.process.is_alive():
+                continue
+
+            logging.error('%s worker with pid %d exited unexpectedly (exitcode %s), respawning', worker.name, worker.process.pid, worker.process.exitcode)
+            self.reap(worker.process, worker.slot)
+            worker.process = None
+            if now - worker.started < RESPAWN_MIN_UPTIME:
+                worker.failures += 1
+            else:
+                worker.failures = 0
+            if worker.failures > RESPAWN_MAX_FAILURES:
+                logging.critical('%s worker keeps failing, initiating abnormal shutdown', worker.name)
+                self.running = False
+                self.abnormal_shutdown = True
+                return
+            self.spawn(worker)
+
+        if self.startup is not None:
+            self.report_startup(now)
+        if self.args.request_budget:
+            self.watchdog()
+        self.autoscale(now)
+        self.recycle()
+
+    def watchdog(self):
+        # Flag requests which exceed the budget, once per request.
+        now = time.time()
+        for worker in self.workers:
+            if worker.process is None or worker.kind == 'metrics':
+                continue
+            stuck = False
+            for request in self.board[worker.slot].current:
+                started = request.started
+                if not started or request.flagged or now - started <= self.args.request_budget:
+                    continue
+                request.flagged = True
+                stuck = True
+                label = request.label.decode('utf-8', 'replace')
+                phase = request.phase.decode('ascii')
+                logging.warning('request "%s" in %s worker with pid %d exceeds budget, running for %.1fs in phase %s', label, worker.name, worker.process.pid, now - started, phase)
+                if self.args.with_metrics and PROMETHEUS:
+                    STUCK_REQUEST_COUNT.labels(label, phase).inc()
+            if not stuck:
+                continue
+            try:
+                os.kill(worker.process.pid, signal.SIGUSR2)
+            except OSError:
+                pass
+            if self.args.recycle_stuck and not self.retiring:
+                self.retire(worker, handover=worker.socket_path is None)
+
+    def report_startup(self, now):
+        workers = [worker for worker in self.workers if worker.kind != 'metrics' and worker.process is not None]
+        if not all(self.board[worker.slot].ready for worker in workers):
+            return
+        uss = [get_uss(worker.process.pid) for worker in workers]
+        logging.info('%d workers ready after %.3fs, unique memory per worker %.1f MiB on average', len(workers), now - self.startup, sum(uss) / len(uss) / 1024 / 1024 if uss else 0)
+        self.startup = None
+
+    def autoscale(self, now):
+        # Scale the rest workers between the configured minimum and maximum,
+        # based on how many of the ready rest workers have requests in flight.
+        if self.rest_workers_max == self.rest_workers_min:
+            return
+
+        rest = [worker for worker in self.workers if worker.kind == 'rest']
+        # Workers waiting for a scoreboard slot are not measured.
+        statuses = [self.board[worker.slot] for worker in rest if worker.process is not None]
+        ready = [status for status in statuses if status.ready]
+        if len(ready) < len(statuses):
+            # Wait until all rest workers are up before measuring.
+            self.scale_busy_since = self.scale_idle_since = None
+            return
+
+        if ready:
+            # A bjoern worker is busy with one request, a threaded worker once
+            # all of its threads are.
+            capacity = self.args.worker_threads if self.args.worker_engine == 'threaded' else 1
+            busy = sum(1 for status in ready if status.inflight >= capacity)
+            ratio = busy / len(ready)
+        elif not rest:
+            # Without rest workers nothing is served, start one right away.
+            busy, ratio = 0, 1
+            self.scale_busy_since = now - AUTOSCALE_UP_DELAY
+        else:
+            return
+
+        if ratio >= AUTOSCALE_UP_RATIO and len(rest) < self.rest_workers_max:
+            self.scale_idle_since = None
+            if self.scale_busy_since is None:
+                self.scale_busy_since = now
+            elif now - self.scale_busy_since >= AUTOSCALE_UP_DELAY:
+                used = {worker.n for worker in rest}
+                n = min(set(range(self.rest_workers_max)) - used)
+                worker = self.rest_worker(n, self.rest_sock)
+                self.workers.append(worker)
+                self.spawn(worker)
+                logging.info('scaled up to %d rest workers (%d of %d busy)', len(rest) + 1, busy, len(ready))
+                self.scale_busy_since = None
+
+        elif ratio <= AUTOSCALE_DOWN_RATIO and len(rest) > self.rest_workers_min and not self.retiring:
+            self.scale_busy_since = None
+            if self.scale_idle_since is None:
+                self.scale_idle_since = now
+            elif now - self.scale_idle_since >= AUTOSCALE_DOWN_DELAY:
+                worker = max(rest, key=lambda worker: worker.n)
+                self.workers.remove(worker)
+                if worker.process is None:
+                    # Not started yet, it has no process to retire.
+                    if worker in self.unspawned:
+                        self.unspawned.remove(worker)
+                else:
+                    retiree = Retiree(worker, respawn=False)
+                    retiree.exit.set()
+                    self.retiring.append(retiree)
+                logging.info('scaled down to %d rest workers (%d of %d busy)', len(rest) - 1, busy, len(ready))
+                self.scale_idle_since = None
+
+        else:
+            self.scale_busy_since = self.scale_idle_since = None
+
+    def recycle(self):
+        # Only recycle one worker at a time, so the capacity of the fleet
+        # never drops by more than one worker.
+        if self.retiring:
+            return
+
+        max_requests = self.args.max_requests
+        max_rss = self.args.max_rss * 1024 * 1024
+        if not max_requests and not max_rss:
+            return
+
+        for worker in self.workers:
+            if worker.kind == 'metrics' or worker.process is None:
+                continue
+
+            status = self.board[worker.slot]
+            if not status.ready:
+                continue
+            if max_requests and status.requests >= max_requests:
+                logging.debug('%s worker with pid %d served %d requests', worker.name, worker.process.pid, status.requests)
+            elif max_rss and get_rss(worker.process.pid) >= max_rss:
+                logging.debug('%s worker with pid %d exceeds memory limit', worker.name, worker.process.pid)
+            else:
+                continue
+
+            # The socket of a worker can only be bound again after its old
+            # process is gone. Shared sockets allow to start the replacement
+            # first, it accepts from the same socket as the old process.
+            self.retire(worker, handover=worker.socket_path is None)
+            return
+
+    def mark_process_dead(self, pid):
+        if self.args.with_metrics and PROMETHEUS and os.environ.get('prometheus_multiproc_dir'):
+            prometheus_multiprocess.mark_process_dead(pid)
+
+    def unlink_socket(self, unix_socket):
+        try:
+            os.unlink(unix_socket)
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                logging.warning('failed to remove socket %s, error: %s', unix_socket, err)
+
+    def control(self, command, args):
+        # Handles commands received on the control socket.
+        if command == 'status':
+            return self.fleet_status()
+
+        if command in ('profile', 'drain'):
+            if not args:
+                return {'error': 'missing worker name'}
+            workers = [worker for worker in self.workers if worker.process is not None and worker.kind != 'metrics' and (worker.name in args or 'all' in args)]
+            if not workers:
+                return {'error': 'no such worker'}
+
+            if command == 'profile':
+                if not self.args.profile_dir:
+                    return {'error': 'profiling is not enabled'}
+                for worker in workers:
+                    try:
+                        os.kill(worker.process.pid, signal.SIGUSR1)
+                    except OSError:
+                        pass
+            else:
+                if len(workers) > 1:
+                    return {'error': 'only one worker can be drained at a time'}
+                if self.retiring:
+                    return {'error': 'another worker is being drained, try again later'}
+                worker = workers[0]
+                self.retire(worker, handover=worker.socket_path is None)
+            return {'workers': [worker.name for worker in workers]}
+
+        if command == 'help':
+            return {'commands': ['status', 'profile <worker|all>', 'drain <worker>']}
+
+        return {'error': 'unknown command'}
+
+    def fleet_status(self):
+        now = time.time()
+        workers = []
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            status = self.board[worker.slot]
+            p50, p90, p99 = status.percentiles(50, 90, 99)
+            workers.append({
+                'name': worker.name,
+                'pid': worker.process.pid,
+                'uptime': now - status.started if status.started else 0,
+                'ready': status.ready,
+                'requests': status.requests,
+                'inflight': status.inflight,
+                'queued': status.queued,
+                'token_sessions': status.token_sessions,
+                'passthrough_sessions': status.passthrough_sessions,
+                'subscriptions': status.subscriptions,
+                'latency': {'p50': p50, 'p90': p90, 'p99': p99},
+                'current': [{
+                    'label': request.label.decode('utf-8', 'replace'),
+                    'phase': request.phase.decode('ascii'),
+                    'age': now - request.started,
+                } for request in status.current if request.started],
+            })
+        return {
+            'pid': os.getpid(),
+            'uptime': now - self.started,
+            'workers': workers,
+            'retiring': [{'name': retiree.worker.name, 'pid': retiree.process.pid} for retiree in self.retiring],
+        }
+
+    def sigusr1(self, *args):
+        # Toggle the profiler of all workers.
+        for worker in self.workers:
+            if worker.process is not None and worker.kind != 'metrics':
+                try:
+                    os.kill(worker.process.pid, signal.SIGUSR1)
+                except OSError:
+                    pass
 
     def sigterm(self, *args):
         try:
@@ -9,6 +9,7 @@ from grapi.mfr import Server
 PROCESS_NAME = 'kopano-mfr'
 SOCKET_PATH = '/var/run/kopano'
 WORKERS = 8
+WORKER_THREADS = 8
 METRICS_LISTEN = 'localhost:6060'
 TRANSLATIONS_PATH = '/usr/share/kopano-grapi/i18n'
 
@@ -24,6 +25,34 @@ def opt_args():
                         help="log level (default: INFO)")
     parser.add_argument("-w", "--workers", dest="workers", type=int, default=WORKERS,
                         help="number of workers (unix sockets)", metavar="N")
+    parser.add_argument("--rest-workers", dest="rest_workers", type=int, default=None,
+                        help="number of rest workers (default: same as --workers)", metavar="N")
+    parser.add_argument("--notify-workers", dest="notify_workers", type=int, default=None,
+                        help="number of notify workers (default: same as --workers)", metavar="N")
+    parser.add_argument("--max-rest-workers", dest="max_rest_workers", type=int, default=0,
+                        help="scale rest workers up to N when busy, requires --shared-sockets (default: 0, disabled)", metavar="N")
+    parser.add_argument("--worker-engine", dest="worker_engine", choices=('bjoern', 'threaded'), default='bjoern',
+                        help="server used by workers, bjoern serves one request at a time (default: bjoern)")
+    parser.add_argument("--worker-threads", dest="worker_threads", type=int, default=WORKER_THREADS,
+                        help="number of threads per worker with the threaded engine (default: {})".format(WORKER_THREADS), metavar="N")
+    parser.add_argument("--shared-sockets", dest='shared_sockets', action='store_true', default=False,
+                        help="let all workers accept from one rest and one notify socket")
+    parser.add_argument("--max-requests", dest="max_requests", type=int, default=0,
+                        help="recycle workers after serving N requests (default: 0, disabled)", metavar="N")
+    parser.add_argument("--max-rss", dest="max_rss", type=int, default=0,
+                        help="recycle workers when their resident memory exceeds MB (default: 0, disabled)", metavar="MB")
+    parser.add_argument("--control-socket", dest="control_socket", default=None,
+                        help="serve the master control socket at PATH (default: disabled)", metavar="PATH")
+    parser.add_argument("--profile-dir", dest="profile_dir", type=is_writable_path, default=None,
+                        help="enable toggling the sampling profiler with SIGUSR1, profiles are written to this path", metavar="PATH")
+    parser.add_argument("--slow-request-threshold", dest="slow_request_threshold", type=float, default=0,
+                        help="log requests taking longer than SECONDS with their phase timings (default: 0, disabled)", metavar="SECONDS")
+    parser.add_argument("--request-budget", dest="request_budget", type=float, default=0,
+                        help="report requests running longer than SECONDS and dump the stacks of their worker (default: 0, disabled)", metavar="SECONDS")
+    parser.add_argument("--recycle-stuck-workers", dest="recycle_stuck", action='store_true', default=False,
+                        help="recycle workers with requests exceeding the request budget")
+    parser.add_argument("--preload", dest='preload', action='store_true', default=False,
+                        help="import the application in the master before forking workers")
     parser.add_argument("--insecure", dest='insecure', action='store_true', default=False,
                         help="allow insecure operations")
     parser.add_argument("--enable-auth-basic", dest='auth_basic', action='store_true', default=False,
@@ -43,6 +72,8 @@ def opt_args():
     parser.add_argument("--enable-experimental-endpoints", dest='with_experimental', action='store_true', default=False, help="enable API endpoints which are considered experimental")
     parser.add_argument("--translations-path", dest='translations_path', default=TRANSLATIONS_PATH, type=is_path,
                         help="path to translations base folder (default: {}".format(TRANSLATIONS_PATH))
+    parser.add_argument("--translations-cache-path", dest='translations_cache_path', default=None, type=is_writable_path,
+                        help="path to cache compiled translations (default: no cache)")
 
     return parser.parse_args()
 
@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""
+Master control socket
+
+Unix socket served by the master in its supervisor loop. Clients send one
+command line per connection, for example `status` or `drain rest3`, and get
+one line of JSON back.
+
+Run `python3 -m grapi.mfr.control PATH COMMAND...` to send a command.
+
+"""
+import json
+import logging
+import os
+import socket
+import sys
+
+TIMEOUT = 1  # Seconds a client may take to send its command.
+
+
+class ControlSocket:
+    def __init__(self, path, handler):
+        self.path = path
+        self.handler = handler
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        self.sock = socket.socket(socket.AF_UNIX)
+        self.sock.bind(path)
+        os.chmod(path, 0o600)
+        self.sock.setblocking(False)
+        self.sock.listen(8)
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def handle(self):
+        try:
+            conn, _ = self.sock.accept()
+        except BlockingIOError:
+            return
+        with conn:
+            conn.settimeout(TIMEOUT)
+            try:
+                line = conn.makefile('rb').readline(4096)
+                args = line.decode('utf-8').split()
+                if not args:
+                    result = {'error': 'no command'}
+                else:
+                    result = self.handler(args[0], args[1:])
+                conn.sendall(json.dumps(result).encode('utf-8') + b'\n')
+            except (OSError, UnicodeDecodeError) as err:
+                logging.debug('control socket client error: %s', err)
+
+    def close(self):
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def command(path, args):
+    """Sends a command to the control socket at path and returns the result."""
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(path)
+        sock.sendall(' '.join(args).encode('utf-8') + b'\n')
+        return json.loads(sock.makefile('rb').readline().decode('utf-8'))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('usage: {} PATH COMMAND [ARGS...]'.format(sys.argv[0]), file=sys.stderr)
+        sys.exit(2)
+    print(json.dumps(command(sys.argv[1], sys.argv[2:]), indent=2))
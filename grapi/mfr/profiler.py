@@ -0,0 +1,113 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""
+Sampling profiler
+
+Samples the stacks of all threads of the process at a fixed interval from a
+background thread and aggregates them, until stopped. The result can be
+written as collapsed stacks (for flame graphs) and as pstats file.
+
+"""
+import collections
+import marshal
+import os
+import sys
+import threading
+import time
+
+INTERVAL = 0.005  # Seconds between samples.
+
+
+class SamplingProfiler:
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self.count = 0
+        self.started = 0
+        self.stopped = 0
+        self.thread = None
+        self.exit = threading.Event()
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.samples.clear()
+        self.count = 0
+        self.started = time.time()
+        self.stopped = 0
+        self.exit.clear()
+        self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.exit.set()
+        self.thread.join()
+        self.thread = None
+        self.stopped = time.time()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.exit.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name, frame.f_globals.get('__name__', '')))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples[(names.get(ident, str(ident)),) + tuple(stack)] += 1
+            self.count += 1
+
+    def write_collapsed(self, path):
+        '''Writes one line per distinct stack, frames from the root separated
+           by semicolons, followed by the number of samples.'''
+        with open(path, 'w') as f:
+            for stack, count in self.samples.items():
+                frames = [stack[0]] + ['%s.%s' % (module, name) for _, _, name, module in stack[1:]]
+                f.write('%s %d\n' % (';'.join(frames), count))
+
+    def write_pstats(self, path):
+        '''Writes the samples in the format of pstats.Stats.dump_stats, with
+           sample counts as call counts and sampled wall clock time as time.'''
+        # Sampling can be delayed by the GIL, so weigh samples by the elapsed
+        # time instead of the interval.
+        interval = self.interval
+        if self.count:
+            interval = ((self.stopped or time.time()) - self.started) / self.count
+        tt = collections.Counter()
+        ct = collections.Counter()
+        callers = collections.defaultdict(collections.Counter)
+        for stack, count in self.samples.items():
+            funcs = [func[:3] for func in stack[1:]]
+            if not funcs:
+                continue
+            tt[funcs[-1]] += count
+            for func in set(funcs):
+                ct[func] += count
+            for caller, callee in set(zip(funcs, funcs[1:])):
+                callers[callee][caller] += count
+
+        stats = {}
+        for func, count in ct.items():
+            stats[func] = (
+                count, count, tt[func] * interval, count * interval,
+                {caller: (n, n, 0.0, n * interval) for caller, n in callers[func].items()},
+            )
+        with open(path, 'wb') as f:
+            marshal.dump(stats, f)
+
+    def dump(self, directory, name):
+        '''Writes collapsed stacks and pstats of the samples so far to
+           directory, returns the path without extension.'''
+        base = os.path.join(directory, '%s-%d-%s' % (name, os.getpid(), time.strftime('%Y%m%d%H%M%S', time.localtime(self.started))))
+        self.write_collapsed(base + '.collapsed')
+        self.write_pstats(base + '.prof')
+        return base
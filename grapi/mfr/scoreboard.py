@@ -0,0 +1,184 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""
+Worker scoreboard
+
+Shared memory table with one slot per worker process. The master allocates
+the table before forking, each worker only writes to its own slot and the
+master (and the metrics process) read all of them.
+
+"""
+import ctypes
+import logging
+import threading
+import time
+from multiprocessing.sharedctypes import RawArray
+
+
+# Maximum number of concurrent requests per worker which are published, further
+# requests are served but not visible in the scoreboard.
+REQUEST_SLOTS = 16
+# Number of most recent request durations kept per worker.
+LATENCY_SAMPLES = 256
+
+
+class RequestStatus(ctypes.Structure):
+    _fields_ = [
+        ('started', ctypes.c_double),  # 0 when idle.
+        ('label', ctypes.c_char * 96),
+        ('phase', ctypes.c_char * 16),
+        ('flagged', ctypes.c_bool),  # Set by the watchdog.
+    ]
+
+    def set(self, label=None, phase=None):
+        if label is not None:
+            self.label = label.encode('utf-8', 'replace')[:95]
+        if phase is not None:
+            self.phase = phase.encode('ascii')
+
+
+class WorkerStatus(ctypes.Structure):
+    _fields_ = [
+        ('kind', ctypes.c_char * 8),
+        ('n', ctypes.c_int),
+        ('pid', ctypes.c_int),
+        ('ready', ctypes.c_bool),
+        ('started', ctypes.c_double),
+        ('requests', ctypes.c_uint64),
+        ('inflight', ctypes.c_int),
+        ('queued', ctypes.c_int),  # Accepted, but not yet in flight.
+        ('current', RequestStatus * REQUEST_SLOTS),
+        ('latencies', ctypes.c_float * LATENCY_SAMPLES),  # Ring buffer.
+        ('token_sessions', ctypes.c_int),  # Published by publish_stats.
+        ('passthrough_sessions', ctypes.c_int),
+        ('subscriptions', ctypes.c_int),
+    ]
+
+    @property
+    def name(self):
+        return '%s%d' % (self.kind.decode('ascii'), self.n)
+
+    def percentiles(self, *percentiles):
+        '''Returns the given percentiles of the recent request durations.'''
+        count = min(self.requests, LATENCY_SAMPLES)
+        if not count:
+            return [None for _ in percentiles]
+        latencies = sorted(self.latencies[:count])
+        return [latencies[min(int(count * p / 100), count - 1)] for p in percentiles]
+
+
+class Scoreboard:
+    def __init__(self, size):
+        self.slots = RawArray(WorkerStatus, size)
+        self.free = list(range(size))
+
+    def __getitem__(self, index):
+        return self.slots[index]
+
+    def acquire(self, kind, n):
+        '''Returns the index of a cleared slot for a new worker process, or
+           None when all slots are in use.
+
+           Only called by the master.
+        '''
+        if not self.free:
+            return None
+        index = self.free.pop(0)
+        ctypes.memset(ctypes.addressof(self.slots[index]), 0, ctypes.sizeof(WorkerStatus))
+        status = self.slots[index]
+        status.kind = kind.encode('ascii')
+        status.n = n
+        return index
+
+    def release(self, index):
+        self.slots[index].pid = 0
+        self.free.append(index)
+
+    def active(self):
+        '''Yields the status of all slots with a running process.'''
+        for status in self.slots:
+            if status.pid:
+                yield status
+
+
+class _TrackedResponse:
+    def __init__(self, result, done, index, started):
+        self.result = result
+        self.done = done
+        self.index = index
+        self.started = started
+
+    def __iter__(self):
+        return iter(self.result)
+
+    def close(self):
+        try:
+            close = getattr(self.result, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.done(self.index, self.started)
+
+
+def track(app, status):
+    '''Wraps a WSGI app to count requests and in-flight requests in status.
+
+       A request is in flight until the server closes its response iterable,
+       so streamed responses are counted until they are fully written. The
+       status entry of the request is passed to the app in the environ as
+       grapi.mfr.request, to publish its label and phase.
+    '''
+    lock = threading.Lock()
+    free = list(range(REQUEST_SLOTS))
+
+    def done(index, started):
+        duration = time.monotonic() - started
+        with lock:
+            status.latencies[status.requests % LATENCY_SAMPLES] = duration
+            status.inflight -= 1
+            status.requests += 1
+            if index is not None:
+                status.current[index].started = 0
+                free.append(index)
+
+    def tracked_app(environ, start_response):
+        started = time.monotonic()
+        index = None
+        with lock:
+            status.inflight += 1
+            if free:
+                index = free.pop()
+        if index is not None:
+            request = status.current[index]
+            request.flagged = False
+            request.set('%s %s' % (environ.get('REQUEST_METHOD', ''), environ.get('PATH_INFO', '')), 'request')
+            request.started = time.time()
+            environ['grapi.mfr.request'] = request
+        try:
+            result = app(environ, start_response)
+        except BaseException:
+            done(index, started)
+            raise
+        if index is not None:
+            status.current[index].set(phase='stream')
+        return _TrackedResponse(result, done, index, started)
+
+    return tracked_app
+
+
+def publish_stats(status, stats, interval=5):
+    '''Starts a thread which publishes the counters returned by stats in
+       status every interval seconds.'''
+
+    def run():
+        while True:
+            try:
+                values = stats()
+            except Exception:  # pylint: disable=broad-except
+                logging.debug('failed to collect stats', exc_info=True)
+            else:
+                status.token_sessions = values.get('token_sessions', 0)
+                status.passthrough_sessions = values.get('passthrough_sessions', 0)
+                status.subscriptions = values.get('subscriptions', 0)
+            time.sleep(interval)
+
+    threading.Thread(target=run, name='stats', daemon=True).start()
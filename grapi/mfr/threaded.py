@@ -0,0 +1,122 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""
+Threaded worker engine
+
+WSGI server for an already listening unix socket, which serves requests with
+a bounded pool of threads. Once all threads are busy, no further connections
+are accepted, so they stay in the socket backlog where other workers sharing
+the socket can pick them up.
+
+"""
+import logging
+import queue
+import socketserver
+import threading
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler
+
+
+class RequestHandler(WSGIRequestHandler):
+    def handle(self):
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+
+        if not self.parse_request():
+            return
+
+        handler = ServerHandler(
+            self.rfile, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=True,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class WSGIServer(socketserver.UnixStreamServer):
+    def __init__(self, sock, app, threads, status=None):
+        super().__init__(sock.getsockname(), RequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.app = app
+        self.status = status
+        self.lock = threading.Lock()
+        self.base_environ = {
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '',
+            'GATEWAY_INTERFACE': 'CGI/1.1',
+            'REMOTE_HOST': '',
+            'CONTENT_LENGTH': '',
+            'SCRIPT_NAME': '',
+        }
+
+        self.slots = threading.BoundedSemaphore(threads)
+        self.active = 0  # Accepted connections which are not done yet.
+        self.requests = queue.SimpleQueue()
+        for n in range(threads):
+            threading.Thread(target=self.process_requests, name='%s-%d' % (threading.current_thread().name, n), daemon=True).start()
+
+    def get_app(self):
+        return self.app
+
+    def get_request(self):
+        request, _ = self.socket.accept()
+        request.setblocking(True)
+        # Unix socket peers have no address, WSGIRequestHandler expects one.
+        return request, ('', 0)
+
+    def process_request(self, request, client_address):
+        # Blocks accepting further connections until a thread is available,
+        # the accepted connection is counted as queued meanwhile.
+        with self.lock:
+            self.active += 1
+            if self.status is not None:
+                self.status.queued += 1
+        self.slots.acquire()
+        if self.status is not None:
+            with self.lock:
+                self.status.queued -= 1
+        self.requests.put((request, client_address))
+
+    def process_requests(self):
+        while True:
+            request, client_address = self.requests.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:  # pylint: disable=broad-except
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                self.slots.release()
+                with self.lock:
+                    self.active -= 1
+
+    def stop_accepting(self):
+        """Stop accepting connections, those accepted are still served.
+
+        Returns:
+            Callable: returns True once all accepted connections are done.
+        """
+        # shutdown waits for serve_forever, which may wait for a thread.
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return lambda: self.active == 0
+
+    def handle_error(self, request, client_address):
+        logging.exception('error while handling request')
+
+
+def server_run(sock, app, threads, status=None, listening=None):
+    """Serve app on the listening sock with threads, this blocks.
+
+    listening is called with the stop_accepting method of the server.
+    """
+    server = WSGIServer(sock, app, threads, status)
+    if listening is not None:
+        listening(server.stop_accepting)
+    server.serve_forever()
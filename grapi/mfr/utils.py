@@ -1,4 +1,5 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
+from functools import lru_cache
 
 
 def parse_accept_language(accept_language):
@@ -55,3 +56,22 @@ def parse_accept_language(accept_language):
     languages.reverse()
 
     return languages
+
+
+def language_resolver(translations, maxsize=256):
+    '''Returns a function which maps a raw Accept-Language header value to the
+       best matching entry of translations, or None.
+
+       Results are cached by header value, as clients send the same few
+       values over and over.
+    '''
+
+    @lru_cache(maxsize=maxsize)
+    def resolve(accept_language):
+        for lang, _ in parse_accept_language(accept_language):
+            translation = translations.get(lang)
+            if translation:
+                return translation
+        return None
+
+    return resolve
@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Measure date formatting of _date and _tzdate over the dates of a page of
+events, against the strftime based formatting, and check both give the same
+results."""
+import argparse
+import datetime
+import timeit
+
+from grapi.api.v1.timezone import to_timezone
+from grapi.backend.kopano.resource import UTC, _date, _date_slow, _tzdate_slow, _tzformat
+
+NUMBER = 100
+DATES = 500
+
+parser = argparse.ArgumentParser(description='grapi date formatting benchmark')
+parser.add_argument('--number', type=int, default=NUMBER, help='pages per case (default: {})'.format(NUMBER))
+parser.add_argument('--dates', type=int, default=DATES, help='dates per page (default: {})'.format(DATES))
+parser.add_argument('--timezone', default='W. Europe Standard Time', help='preferred timezone for _tzdate')
+args = parser.parse_args()
+
+# Dates spread over a year, so pages cross DST transitions.
+start = datetime.datetime(2020, 1, 1, 0, 0, 0, 1)
+dates = [start + datetime.timedelta(minutes=1051 * i) for i in range(args.dates)]
+tz = to_timezone(args.timezone)
+
+cases = (
+    ('_date', lambda d: _date_slow(d), lambda d: _date(d)),
+    ('_tzdate UTC', lambda d: _tzdate_slow(d, UTC), lambda d: _tzformat(d, UTC)),
+    ('_tzdate %s' % tz, lambda d: _tzdate_slow(d, tz), lambda d: _tzformat(d, tz)),
+)
+for name, slow, fast in cases:
+    for d in dates:
+        assert slow(d) == fast(d), (name, d, slow(d), fast(d))
+    before = timeit.timeit(lambda: [slow(d) for d in dates], number=args.number)
+    after = timeit.timeit(lambda: [fast(d) for d in dates], number=args.number)
+    print('%-36s %6.2f ms/page before, %6.2f ms/page after' % (
+        name, before / args.number * 1e3, after / args.number * 1e3))
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Measure the per-item overhead of rendering fields, with the accessors of
+MessageResource and EventResource replaced by ones which return None."""
+import argparse
+import timeit
+
+from grapi.backend.kopano.event import EventResource
+from grapi.backend.kopano.message import MessageResource
+
+NUMBER = 100000
+
+parser = argparse.ArgumentParser(description='grapi field rendering benchmark')
+parser.add_argument('--number', type=int, default=NUMBER, help='items per case (default: {})'.format(NUMBER))
+args = parser.parse_args()
+
+
+def nop_fields(fields):
+    return {
+        name: (lambda obj: None) if accessor.__code__.co_argcount == 1 else (lambda req, obj: None)
+        for name, accessor in fields.items()
+    }
+
+
+def get_fields_per_field(req, obj, fields, all_fields):
+    # Rendering as done before plans were cached.
+    result = {}
+    for f in fields or all_fields:
+        accessor = all_fields.get(f, None)
+        if accessor is not None:
+            if accessor.__code__.co_argcount == 1:
+                result[f] = accessor(obj)
+            else:
+                result[f] = accessor(req, obj)
+    return result
+
+
+for resource_cls in (MessageResource, EventResource):
+    resource = resource_cls({})
+    all_fields = nop_fields(resource_cls.fields)
+    select = {'subject', 'id', '@odata.etag', '@odata.type', 'start', 'from'}
+    for name, fields in (('all', None), ('$select', select)):
+        before = timeit.timeit(lambda: get_fields_per_field(None, None, fields, all_fields), number=args.number)
+        after = timeit.timeit(lambda: resource.get_fields(None, None, fields, all_fields), number=args.number)
+        print('%-16s %-8s %6.2f us/item before, %6.2f us/item after' % (
+            resource_cls.__name__, name, before / args.number * 1e6, after / args.number * 1e6))
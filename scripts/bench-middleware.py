@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Measure the time spent per request in the middleware chain, using the mock
+backend and a resource which does nothing."""
+import argparse
+import timeit
+
+from falcon import testing
+
+from grapi.api.v1 import API
+from grapi.api.v1.resource import _parse_qs
+
+NUMBER = 10000
+
+parser = argparse.ArgumentParser(description='grapi middleware benchmark')
+parser.add_argument('--number', type=int, default=NUMBER, help='requests per case (default: {})'.format(NUMBER))
+args = parser.parse_args()
+
+
+class NopResource:
+    def on_get(self, req, resp):
+        pass
+
+
+class ArgsResource:
+    def on_get(self, req, resp):
+        for _ in range(4):  # respond, generator, folder_gen and json_multi
+            _parse_qs(req)
+
+
+api = API(backends=['mock'])
+api.add_route('/bench/nop', NopResource())
+api.add_route('/bench/args', ArgsResource())
+client = testing.TestClient(api)
+
+CASES = [
+    ('middleware only', '/bench/nop', {}, ''),
+    ('query string', '/bench/args', {}, '$top=10&$skip=20&$select=subject,from'),
+    ('prefer header', '/bench/nop', {'Prefer': 'outlook.timezone="Europe/Amsterdam"'}, ''),
+    ('mock resource', '/api/gc/v1/me/messages', {}, '$top=10'),
+]
+
+for name, path, headers, query_string in CASES:
+    t = timeit.timeit(lambda: client.simulate_get(path, headers=headers, query_string=query_string), number=args.number)
+    print('%-16s %8.1f us/request' % (name, t / args.number * 1e6))
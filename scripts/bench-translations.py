@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+# SPDX-License-Identifier: AGPL-3.0-or-later
+"""Measure resolving Accept-Language headers with and without the resolver
+cache, and loading the translations with and without the compiled catalog
+cache."""
+import argparse
+import os
+import tempfile
+import timeit
+
+from grapi.mfr import Server
+from grapi.mfr.utils import language_resolver, parse_accept_language
+
+NUMBER = 10000
+LOADS = 100
+ACCEPT_LANGUAGE = 'de-DE,de;q=0.9,en-US;q=0.8,en;q=0.7'
+
+parser = argparse.ArgumentParser(description='grapi translations benchmark')
+parser.add_argument('--number', type=int, default=NUMBER, help='headers per case (default: {})'.format(NUMBER))
+parser.add_argument('--loads', type=int, default=LOADS, help='translation loads per case (default: {})'.format(LOADS))
+parser.add_argument('--translations-path', default=os.path.join(os.path.dirname(__file__), '..', 'i18n'), help='directory with .po files')
+args = parser.parse_args()
+
+server = Server()
+translations = server.get_translations(args.translations_path)
+
+
+def resolve_uncached(accept_language):
+    # Resolving as done before the resolver cache.
+    for lang, _ in parse_accept_language(accept_language):
+        translation = translations.get(lang)
+        if translation:
+            return translation
+    return None
+
+
+resolve = language_resolver(translations)
+before = timeit.timeit(lambda: resolve_uncached(ACCEPT_LANGUAGE), number=args.number)
+after = timeit.timeit(lambda: resolve(ACCEPT_LANGUAGE), number=args.number)
+print('%-24s %8.2f us before, %8.2f us after' % ('Accept-Language', before / args.number * 1e6, after / args.number * 1e6))
+
+with tempfile.TemporaryDirectory() as cache_path:
+    server.get_translations(args.translations_path, cache_path)  # Fill the cache.
+    before = timeit.timeit(lambda: server.get_translations(args.translations_path), number=args.loads)
+    after = timeit.timeit(lambda: server.get_translations(args.translations_path, cache_path), number=args.loads)
+print('%-24s %8.2f ms before, %8.2f ms after' % ('load translations', before / args.loads * 1e3, after / args.loads * 1e3))
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
-from grapi.mfr.utils import parse_accept_language
+from grapi.mfr.utils import language_resolver, parse_accept_language
 
 
 def test_empty():
@@ -21,3 +21,12 @@ def test_quality():
 
 def test_normal():
     assert parse_accept_language('de-DE,ar-TN;q=0.7,de-AT;q=0.3') == [('de-de', 1), ('de', 0.99), ('ar-tn', 0.7), ('ar', 0.68), ('de-at', 0.3), ('de', 0.27)]
+
+
+def test_language_resolver():
+    translations = {'en': 'en', 'de': 'de'}
+    resolve = language_resolver(translations)
+    assert resolve('de-DE,en;q=0.5') == 'de'
+    assert resolve('fr-FR, en;q=0.3') == 'en'
+    assert resolve('fr') is None
+    assert resolve.cache_info().currsize == 3
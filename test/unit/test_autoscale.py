@@ -0,0 +1,62 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+import types
+from unittest.mock import Mock
+
+import pytest
+
+from grapi.mfr import AUTOSCALE_DOWN_DELAY, AUTOSCALE_UP_DELAY, Server, Worker
+from grapi.mfr.scoreboard import Scoreboard
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    server.args = types.SimpleNamespace(socket_path='/tmp', worker_engine='bjoern', worker_threads=1)
+    server.rest_sock = object()
+    server.rest_workers_min = 0
+    server.rest_workers_max = 3
+    server.scale_busy_since = None
+    server.scale_idle_since = None
+    server.board = Scoreboard(7)
+    server.workers = []
+    server.retiring = []
+    server.unspawned = []
+    server.spawn = Mock(return_value=True)
+    return server
+
+
+def add_worker(server, n, inflight=0, spawned=True):
+    worker = Worker('rest', n, None, ())
+    if spawned:
+        worker.process = Mock()
+        worker.slot = server.board.acquire('rest', n)
+        server.board[worker.slot].ready = True
+        server.board[worker.slot].inflight = inflight
+    else:
+        server.unspawned.append(worker)
+    server.workers.append(worker)
+    return worker
+
+
+def test_autoscale_without_rest_workers(server):
+    server.autoscale(100)
+    assert [worker.name for worker in server.workers] == ['rest0']
+    server.spawn.assert_called_once_with(server.workers[0])
+
+
+def test_autoscale_with_unspawned_worker(server):
+    add_worker(server, 0, inflight=1)
+    add_worker(server, 1, spawned=False)
+    server.autoscale(100)
+    server.autoscale(100 + AUTOSCALE_UP_DELAY)
+    assert [worker.name for worker in server.workers] == ['rest0', 'rest1', 'rest2']
+
+
+def test_autoscale_down_unspawned_worker(server):
+    add_worker(server, 0)
+    worker = add_worker(server, 1, spawned=False)
+    server.autoscale(100)
+    server.autoscale(100 + AUTOSCALE_DOWN_DELAY)
+    assert worker not in server.workers
+    assert worker not in server.unspawned
+    assert not server.retiring
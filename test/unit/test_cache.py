@@ -0,0 +1,98 @@
+"""Test backend/kopano/cache module."""
+from unittest.mock import Mock
+
+from grapi.backend.kopano.cache import BodyCache, DirectoryCache
+
+
+def mock_server(changed=False):
+    server = Mock()
+
+    def sync_gab(changes, state):
+        if server.changed:
+            changes.update(None)
+        return 'state%d' % server.sync_gab.call_count
+
+    server.changed = changed
+    server.sync_gab.side_effect = sync_gab
+    return server
+
+
+def test_directory_cache_hit():
+    """Test that responses are cached while the GAB does not change."""
+    server = mock_server()
+    cache = DirectoryCache(maxsize=2, interval=0)
+    data, generation = cache.get(server, 'company', 'key')
+    assert data is None
+    cache.put('company', 'key', b'data', generation)
+    assert cache.get(server, 'company', 'key') == (b'data', generation)
+    assert cache.get(server, 'other', 'key')[0] is None
+
+
+def test_directory_cache_invalidation():
+    """Test that GAB changes clear responses and drop stale puts."""
+    server = mock_server()
+    cache = DirectoryCache(maxsize=2, interval=0)
+    _, generation = cache.get(server, 'company', 'key')
+    cache.put('company', 'key', b'data', generation)
+
+    server.changed = True
+    data, new_generation = cache.get(server, 'company', 'key')
+    assert data is None
+    assert new_generation != generation
+
+    cache.put('company', 'key', b'stale', generation)
+    server.changed = False
+    assert cache.get(server, 'company', 'key')[0] is None
+
+
+def test_directory_cache_interval():
+    """Test that the GAB state is checked at most once per interval."""
+    server = mock_server()
+    cache = DirectoryCache(maxsize=2, interval=60)
+    cache.get(server, 'company', 'key')
+    cache.get(server, 'company', 'key')
+    assert server.sync_gab.call_count == 1
+
+
+def test_directory_cache_size():
+    """Test that the least recently used response is evicted."""
+    server = mock_server()
+    cache = DirectoryCache(maxsize=2, interval=0)
+    _, generation = cache.get(server, 'company', 'a')
+    cache.put('company', 'a', b'a', generation)
+    cache.put('company', 'b', b'b', generation)
+    cache.get(server, 'company', 'a')
+    cache.put('company', 'c', b'c', generation)
+    assert cache.get(server, 'company', 'a')[0] == b'a'
+    assert cache.get(server, 'company', 'b')[0] is None
+
+
+def test_directory_cache_disabled():
+    """Test that a cache without size stores nothing."""
+    server = mock_server()
+    cache = DirectoryCache(maxsize=0)
+    assert cache.get(server, 'company', 'key') == (None, None)
+    cache.put('company', 'key', b'data', None)
+    assert not server.sync_gab.called
+
+
+def test_body_cache():
+    """Test that bodies are evicted least recently used first by size."""
+    cache = BodyCache(maxsize=40)
+    cache.put('a', 'a' * 10)
+    cache.put('b', 'b' * 10)
+    cache.put('c', 'c' * 10)
+    assert cache.get('a') == 'a' * 10
+    cache.put('d', 'd' * 10)
+    cache.put('e', 'e' * 10)
+    assert cache.size == 40
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' * 10
+
+
+def test_body_cache_large():
+    """Test that bodies larger than a quarter of the cache are not stored."""
+    cache = BodyCache(maxsize=40)
+    cache.put('a', 'a' * 11)
+    assert cache.get('a') is None
+    assert cache.size == 0
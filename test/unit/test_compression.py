@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+import gzip
+import zlib
+
+import pytest
+
+from grapi.api.v1.middleware.compression import accepted_encoding, compressed_stream
+
+
+@pytest.mark.parametrize(('header', 'encoding'), [
+    ('gzip, deflate, br', 'gzip'),
+    ('deflate', 'deflate'),
+    ('gzip;q=0, deflate;q=0.5', 'deflate'),
+    ('*', 'gzip'),
+    ('identity', None),
+])
+def test_accepted_encoding(header, encoding):
+    assert accepted_encoding(header) == encoding
+
+
+def test_compressed_stream():
+    chunks = [b'{"value": [\n', b'{"id": "1"}', b'\n]}']
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    data = b''.join(compressed_stream(iter(chunks), compressor))
+    assert gzip.decompress(data) == b''.join(chunks)
+
+
+def test_compressed_stream_flush():
+    chunks = [b'{"value": [\n', b'{"id": "1"}', b'\n]}']
+    stream = compressed_stream(iter(chunks), zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS))
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+    for chunk in chunks:
+        assert decompressor.decompress(next(stream)) == chunk
@@ -0,0 +1,85 @@
+"""Test backend/kopano/event module."""
+from unittest.mock import Mock
+
+import kopano
+from falcon import testing
+
+from grapi.api.v1.request import Request
+from grapi.backend.kopano import event
+
+
+def mock_request(userstore):
+    req = Request(testing.create_environ())
+    req.context.user_store = userstore
+    return req
+
+
+def mock_event(store):
+    item = Mock(store=store)
+    item.from_.email = item.sender.email = 'user1@kopano.com'
+    return item
+
+
+def test_is_event_organizer_delegation():
+    """Test that the delegation of a store is looked up once per request."""
+    userstore = Mock()
+    store = Mock()
+    req = mock_request(userstore)
+    assert event.is_event_organizer(req, mock_event(store))
+    assert event.is_event_organizer(req, mock_event(store))
+    store.user.delegation.assert_called_once_with(userstore.user)
+
+    other = Mock()
+    other.user.delegation.side_effect = kopano.errors.NotFoundError()
+    assert not event.is_event_organizer(req, mock_event(other))
+
+
+def test_is_event_organizer_own_store():
+    """Test that events in the store of the user are organized by the user."""
+    userstore = Mock()
+    assert event.is_event_organizer(mock_request(userstore), mock_event(userstore))
+    assert not userstore.user.delegation.called
+
+
+def test_series_master_id():
+    """Test that the master of occurrences is resolved once per request."""
+    master = Mock(entryid='master', eventid='event')
+    req = mock_request(Mock())
+    occurrences = [Mock(spec=kopano.Occurrence, recurring=True, item=master) for _ in range(2)]
+    assert [event.series_master_id(req, occurrence) for occurrence in occurrences] == ['event', 'event']
+
+    other = Mock(entryid='other', eventid='other-event')
+    assert event.series_master_id(req, Mock(spec=kopano.Occurrence, recurring=True, item=other)) == 'other-event'
+    assert event.series_master_id(req, Mock(recurring=True)) is None
+
+
+def mock_attendee(email):
+    attendee = Mock(response='Accepted', response_time=None, type_='Required')
+    attendee.address.name = email
+    attendee.address.email = email
+    return attendee
+
+
+def mock_occurrence(attendees, exception=False, basedate='1'):
+    occurrence = Mock(spec=kopano.Occurrence)
+    occurrence.entryid = 'series'
+    occurrence.eventid = 'series-' + basedate
+    occurrence.exception = exception
+    occurrence.attendees = Mock(return_value=[mock_attendee(email) for email in attendees])
+    return occurrence
+
+
+def test_event_attendees_exception():
+    """Test that exceptions do not share the attendees of their series."""
+    req = mock_request(Mock())
+    first = mock_occurrence(['user1@kopano.com'])
+    second = mock_occurrence(['user1@kopano.com'], basedate='2')
+    exception = mock_occurrence(['user2@kopano.com'], exception=True, basedate='3')
+
+    attendees = event.event_attendees(req, first)
+    assert [attendee['emailAddress']['address'] for attendee in attendees] == ['user1@kopano.com']
+    assert event.event_attendees(req, second) == attendees
+    assert not second.attendees.called
+
+    attendees = event.event_attendees(req, exception)
+    assert [attendee['emailAddress']['address'] for attendee in attendees] == ['user2@kopano.com']
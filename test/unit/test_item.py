@@ -0,0 +1,62 @@
+"""Test backend/kopano/item module."""
+from unittest.mock import Mock, PropertyMock
+
+import kopano
+from falcon import testing
+
+from grapi.api.v1.request import Request
+from grapi.backend.kopano import item as item_module
+
+
+def mock_item(parent):
+    item = Mock()
+    item.prop.return_value.value = parent
+    item.folder.entryid = 'folder-%s' % parent.decode()
+    return item
+
+
+def test_parent_folder_id():
+    """Test that each parent folder is opened once per request."""
+    req = Request(testing.create_environ())
+    first, second, other = mock_item(b'a'), mock_item(b'a'), mock_item(b'b')
+    assert item_module.parent_folder_id(req, first) == 'folder-a'
+    assert item_module.parent_folder_id(req, second) == 'folder-a'
+    assert item_module.parent_folder_id(req, other) == 'folder-b'
+    assert not second.folder.method_calls
+    assert second.prop.called
+
+
+def body_request(content_type=None):
+    headers = {'Prefer': 'outlook.body-content-type="%s"' % content_type} if content_type else {}
+    req = Request(testing.create_environ(headers=headers))
+    if content_type:
+        req.context.prefer.update('outlook.body-content-type', content_type)
+    return req
+
+
+def test_get_body_cached():
+    """Test that bodies are cached per entry ID, change key and type."""
+    item = Mock(entryid='body-cached', changekey='1', html_utf8='<p>caf\xe9</p>'.encode('utf-8'), text='text')
+    assert item_module.get_body(body_request(), item) == {'contentType': 'html', 'content': '<p>caf\xe9</p>'}
+    assert item_module.get_body(body_request('text'), item) == {'contentType': 'text', 'content': 'text'}
+
+    item.html_utf8 = b'<p>changed</p>'
+    item.text = 'changed'
+    assert item_module.get_body(body_request(), item)['content'] == '<p>caf\xe9</p>'
+    assert item_module.get_body(body_request('text'), item)['content'] == 'text'
+
+    item.changekey = '2'
+    assert item_module.get_body(body_request(), item)['content'] == '<p>changed</p>'
+
+
+def test_get_body_uncached():
+    """Test that bodies of occurrences and embedded items are not cached."""
+    occurrence = Mock(spec=kopano.Occurrence, entryid='body-occurrence', changekey='1', html_utf8=b'first')
+    assert item_module.get_body(body_request(), occurrence)['content'] == 'first'
+    occurrence.html_utf8 = b'second'
+    assert item_module.get_body(body_request(), occurrence)['content'] == 'second'
+
+    embedded = Mock(html_utf8=b'embedded')
+    type(embedded).entryid = PropertyMock(side_effect=TypeError)
+    type(embedded).changekey = PropertyMock(side_effect=TypeError)
+    assert item_module.get_body(body_request(), embedded)['content'] == 'embedded'
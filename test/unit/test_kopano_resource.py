@@ -0,0 +1,187 @@
+"""Test backend/kopano/resource module."""
+import datetime
+import time
+from unittest.mock import Mock
+
+import pytest
+import pytz
+from falcon import testing
+from MAPI.Struct import SPropValue
+from MAPI.Tags import PR_CONTENT_COUNT, PR_CONTENT_UNREAD, PR_DELETED_COUNT_TOTAL, PR_LOCAL_COMMIT_TIME_MAX
+from MAPI.Time import FileTime
+
+from grapi.api.v1.request import Request
+from grapi.api.v1.timezone import to_timezone
+from grapi.backend.kopano import resource as resource_module
+from grapi.backend.kopano.resource import (UTC, Resource, _date, _date_slow, _field_plan, _memo, _tzdate, _tzdate_slow,
+                                           _tzformat)
+
+
+def mock_folder(values):
+    folder = Mock()
+    folder.mapiobj.GetProps.side_effect = lambda tags, flags: [SPropValue(tag, values[tag]) for tag in tags]
+    return folder
+
+
+def test_etag_collection_stable():
+    """Test that consecutive requests of a folder yield the same ETag."""
+    values = {
+        PR_LOCAL_COMMIT_TIME_MAX: FileTime(132000000000000000),
+        PR_CONTENT_COUNT: 10,
+        PR_CONTENT_UNREAD: 2,
+        PR_DELETED_COUNT_TOTAL: 1,
+    }
+    folder = mock_folder(values)
+    resource = Resource({})
+    req = Request(testing.create_environ())
+    etag = resource.etag(req, (), folder)
+    assert etag is not None
+    assert resource.etag(req, (), folder) == etag
+    assert resource.etag(Request(testing.create_environ()), (), folder) == etag
+
+    values[PR_CONTENT_UNREAD] = 1
+    assert resource.etag(req, (), folder) != etag
+
+
+def test_etag_collection_without_folder():
+    """Test that collections without folder have no ETag."""
+    assert Resource({}).etag(Request(testing.create_environ()), ()) is None
+
+
+def test_field_plan():
+    """Test that field plans keep order and skip fields without accessor."""
+    all_fields = {
+        'id': lambda item: item.entryid,
+        'body': lambda req, item: req,
+    }
+    plan = _field_plan(['body', 'unknown', 'id'], all_fields)
+    assert [(name, needs_req) for name, _, needs_req in plan] == [('body', True), ('id', False)]
+    assert plan[0][1] is all_fields['body']
+    assert _field_plan(['body', 'unknown', 'id'], all_fields) is plan
+    assert [name for name, _, _ in _field_plan(all_fields, all_fields)] == ['id', 'body']
+
+
+def test_get_fields():
+    """Test rendering of selected fields with both kinds of accessors."""
+    item = Mock(entryid='abc')
+    all_fields = {
+        'id': lambda item: item.entryid,
+        'req': lambda req, item: req,
+        '@odata.type': lambda item: None,
+    }
+    resource = Resource({})
+    assert resource.get_fields('req', item, None, all_fields) == {'id': 'abc', 'req': 'req'}
+    assert resource.get_fields('req', item, frozenset(['id']), all_fields) == {'id': 'abc'}
+
+
+def test_merged_fields_cached():
+    """Test that merged fields are built once per resource class."""
+    class FieldsResource(Resource):
+        fields = {'id': lambda item: item.entryid}
+        complementary_fields = {'extra': lambda item: None}
+
+    resource = FieldsResource({})
+    fields = resource._get_fields((), True)
+    assert set(fields) == {'id', 'extra'}
+    assert FieldsResource({})._get_fields((), True) is fields
+    assert resource._get_fields((), False) is FieldsResource.fields
+
+
+def test_memo():
+    """Test that memoized values are computed once per request and key."""
+    func = Mock(side_effect=lambda value: value * 2)
+    req = Request(testing.create_environ())
+    assert _memo(req, ('double', 1), func, 1) == 2
+    assert _memo(req, ('double', 1), func, 1) == 2
+    assert _memo(req, ('double', 2), func, 2) == 4
+    assert func.call_count == 2
+
+    assert _memo(Request(testing.create_environ()), ('double', 1), func, 1) == 2
+    assert func.call_count == 3
+
+
+
+@pytest.mark.parametrize('fail', [False, True])
+def test_respond_directory_failed_item(monkeypatch, fail):
+    """Test that directory responses missing failed items are not cached."""
+    cache = Mock()
+    cache.get.return_value = (None, 1)
+    monkeypatch.setattr(resource_module, 'directory_cache', cache)
+
+    def json(req, obj, fields, all_fields, multi=False, expand=None):
+        if fail and obj == 2:
+            raise ValueError(obj)
+        return b'{"id": %d}' % obj
+
+    resource = Resource({})
+    resource.json = json
+    req = Request(testing.create_environ(path='/users'))
+    resp = Mock(body=None)
+
+    def render():
+        resp.stream = resource.json_multi(req, [1, 2], None, {}, 10, 0, 2, None)
+
+    resource.respond_directory(req, resp, Mock(), 'company', (), render)
+    assert (b'"id": 2' in resp.body) is not fail
+    assert cache.put.called is not fail
+
+
+
+@pytest.fixture
+def amsterdam(monkeypatch):
+    """Use Europe/Amsterdam as local timezone."""
+    def clear():
+        time.tzset()
+        for func in (resource_module._mktime_offset, resource_module._local_offset, resource_module._zone_offset):
+            func.cache_clear()
+
+    monkeypatch.setenv('TZ', 'Europe/Amsterdam')
+    monkeypatch.setattr(resource_module, 'LOCAL', pytz.timezone('Europe/Amsterdam'))
+    clear()
+    yield
+    monkeypatch.undo()
+    clear()
+
+
+def test_date(amsterdam):
+    """Test formatting of naive local dates as UTC."""
+    assert _date(None) == '0001-01-01T00:00:00Z'
+    assert _date(datetime.datetime(2020, 1, 1, 12, 30, 5)) == '2020-01-01T11:30:05Z'
+    assert _date(datetime.datetime(2020, 7, 1, 12, 30, 5)) == '2020-07-01T10:30:05Z'
+    assert _date(datetime.datetime(2020, 1, 1, 12, 30, 5, 123)) == '2020-01-01T11:30:05.000000Z'
+    assert _date(datetime.datetime(2020, 1, 1, 12, 30, 5), local=True) == '2020-01-01T11:30:05'
+    assert _date(datetime.datetime(2020, 1, 1, 0, 30), show_time=False) == '2019-12-31Z'
+    assert _date(datetime.datetime(500, 1, 1, 12)) == _date_slow(datetime.datetime(500, 1, 1, 12))
+
+
+def test_tzformat(amsterdam):
+    """Test formatting of dates in a timezone, around DST transitions."""
+    assert _tzformat(datetime.datetime(2020, 3, 29, 1, 30), UTC) == '2020-03-29T00:30:00'
+    assert _tzformat(datetime.datetime(2020, 3, 29, 3, 30), UTC) == '2020-03-29T01:30:00'
+    # Ambiguous times are taken as standard time, like pytz localizes them.
+    assert _tzformat(datetime.datetime(2020, 10, 25, 2, 30), UTC) == '2020-10-25T01:30:00'
+    assert _tzformat(datetime.datetime(2020, 10, 25, 12, 0, 0, 500), to_timezone('Pacific Standard Time')) == '2020-10-25T04:00:00'
+    assert _tzformat(UTC.localize(datetime.datetime(2020, 3, 8, 10, 0)), to_timezone('Pacific Standard Time')) == '2020-03-08T03:00:00'
+
+
+@pytest.mark.parametrize('start', [datetime.datetime(2020, 3, 28), datetime.datetime(2020, 10, 24)])
+def test_dates_around_transitions(amsterdam, start):
+    """Test that the fast formatting matches strftime around DST transitions."""
+    pacific = to_timezone('Pacific Standard Time')
+    for minutes in range(0, 3 * 24 * 60, 7):
+        d = start + datetime.timedelta(minutes=minutes, seconds=minutes % 60)
+        assert _tzformat(d, UTC) == _tzdate_slow(d, UTC)
+        assert _tzformat(d, pacific) == _tzdate_slow(d, pacific)
+        if d.hour not in (1, 2, 3):
+            assert _date(d) == _date_slow(d)
+
+
+def test_tzdate(amsterdam):
+    """Test that _tzdate applies the timezone preference of the request."""
+    req = Request(testing.create_environ())
+    d = datetime.datetime(2020, 1, 1, 12, 0)
+    assert _tzdate(None, None, req) is None
+    assert _tzdate(d, None, req) == {'dateTime': '2020-01-01T11:00:00', 'timeZone': 'UTC'}
+
+    req.context.prefer.update('outlook.timezone', (to_timezone('Pacific Standard Time'), 'Pacific Standard Time'))
+    assert _tzdate(d, None, req) == {'dateTime': '2020-01-01T03:00:00', 'timeZone': 'Pacific Standard Time'}
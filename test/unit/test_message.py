@@ -1,6 +1,12 @@
 """Test backend/kopano/message module."""
 from unittest.mock import Mock
 
+from falcon import testing
+from MAPI import MAPI_BCC, MAPI_CC, MAPI_TO
+from MAPI.Struct import SPropValue
+from MAPI.Tags import PR_ADDRTYPE_W, PR_DISPLAY_NAME_W, PR_EMAIL_ADDRESS_W, PR_RECIPIENT_TYPE, PR_SMTP_ADDRESS_W
+
+from grapi.api.v1.request import Request
 from grapi.backend.kopano import message
 
 
@@ -56,3 +62,39 @@ def test_set_subject():
     item = Mock()
     message.update_attr_value(item, "subject", "hello!")
     assert item.subject == "hello!"
+
+
+def mock_recipients_item(rows):
+    item = Mock(entryid='abc')
+    item.mapiobj.GetRecipientTable.return_value.QueryRows.return_value = [
+        [SPropValue(tag, value) for tag, value in row.items()] for row in rows
+    ]
+    return item
+
+
+def test_recipients_json():
+    """Test that recipients of all types are read from one recipient table."""
+    item = mock_recipients_item([
+        {PR_RECIPIENT_TYPE: MAPI_TO, PR_DISPLAY_NAME_W: 'user1', PR_SMTP_ADDRESS_W: 'user1@kopano.com'},
+        {PR_RECIPIENT_TYPE: MAPI_CC, PR_ADDRTYPE_W: 'SMTP', PR_EMAIL_ADDRESS_W: 'user2@kopano.com'},
+        {PR_RECIPIENT_TYPE: MAPI_BCC, PR_DISPLAY_NAME_W: 'user3', PR_SMTP_ADDRESS_W: 'user3@kopano.com'},
+    ])
+    req = Request(testing.create_environ())
+    assert message.recipients_json(req, item, 'to') == [{'emailAddress': {'name': 'user1', 'address': 'user1@kopano.com'}}]
+    assert message.recipients_json(req, item, 'cc') == [{'emailAddress': {'name': '', 'address': 'user2@kopano.com'}}]
+    assert message.recipients_json(req, item, 'bcc') == [{'emailAddress': {'name': 'user3', 'address': 'user3@kopano.com'}}]
+    item.mapiobj.GetRecipientTable.assert_called_once()
+
+
+def test_recipients_json_without_smtp_address():
+    """Test that recipients without SMTP address are resolved by pyko."""
+    item = mock_recipients_item([
+        {PR_RECIPIENT_TYPE: MAPI_TO, PR_ADDRTYPE_W: 'ZARAFA', PR_EMAIL_ADDRESS_W: 'user1'},
+    ])
+    recipient = Mock(email='user1@kopano.com')
+    recipient.name = 'user1'
+    item.to = [recipient]
+    item.cc = item.bcc = []
+    req = Request(testing.create_environ())
+    assert message.recipients_json(req, item, 'to') == [{'emailAddress': {'name': 'user1', 'address': 'user1@kopano.com'}}]
+    assert message.recipients_json(req, item, 'cc') == []
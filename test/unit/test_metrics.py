@@ -0,0 +1,41 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+import os
+from unittest.mock import Mock
+
+import pytest
+
+from grapi import mfr
+
+GAUGES = ('MEMORY_GAUGE', 'RSS_GAUGE', 'PSS_GAUGE', 'USS_GAUGE', 'CPUTIME_GAUGE', 'FDS_GAUGE',
+          'VOLUNTARY_CTXT_GAUGE', 'NONVOLUNTARY_CTXT_GAUGE', 'INFLIGHT_GAUGE', 'QUEUED_GAUGE')
+
+
+@pytest.fixture
+def gauges(monkeypatch):
+    gauges = {}
+    for name in GAUGES:
+        gauges[name] = Mock()
+        monkeypatch.setattr(mfr, name, gauges[name], raising=False)
+    return gauges
+
+
+def test_collect_worker_metrics(gauges):
+    mfr.collect_worker_metrics([('rest0', os.getpid(), None)])
+    assert gauges['MEMORY_GAUGE'].labels('rest0').set.called
+    assert gauges['FDS_GAUGE'].labels('rest0').set.called
+    assert not gauges['INFLIGHT_GAUGE'].labels('rest0').set.called
+
+
+def test_collect_worker_metrics_missing_smaps(gauges, monkeypatch):
+    def read_smaps_rollup(pid):
+        raise FileNotFoundError(pid)
+
+    monkeypatch.setattr(mfr, 'read_smaps_rollup', read_smaps_rollup)
+    mfr.collect_worker_metrics([('rest0', os.getpid(), Mock(inflight=1, queued=0))])
+    assert not gauges['RSS_GAUGE'].labels('rest0').set.called
+    assert not gauges['USS_GAUGE'].labels('rest0').set.called
+    assert gauges['MEMORY_GAUGE'].labels('rest0').set.called
+    assert gauges['CPUTIME_GAUGE'].labels('rest0').set.called
+    assert gauges['VOLUNTARY_CTXT_GAUGE'].labels('rest0').set.called
+    assert gauges['FDS_GAUGE'].labels('rest0').set.called
+    gauges['INFLIGHT_GAUGE'].labels('rest0').set.assert_called_with(1)
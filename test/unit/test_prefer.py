@@ -0,0 +1,34 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+from falcon import testing
+
+from grapi.api.v1.prefer import Prefer
+from grapi.api.v1.request import Request
+from grapi.api.v1.utils import _header_args, _header_sub_arg, _parse_header_args
+
+PREFER = 'outlook.timezone="Europe/Amsterdam";outlook.body-content-type="text"'
+
+
+def test_parse_header_args_cached():
+    args = _parse_header_args(PREFER)
+    assert args == {'outlook.timezone': '"Europe/Amsterdam"', 'outlook.body-content-type': '"text"'}
+    assert _parse_header_args(PREFER) is args
+
+
+def test_header_args_copy():
+    req = Request(testing.create_environ(headers={'Prefer': PREFER}))
+    args = _header_args(req, 'Prefer')
+    args['outlook.timezone'] = 'changed'
+    assert _header_args(req, 'Prefer')['outlook.timezone'] == '"Europe/Amsterdam"'
+    assert _header_sub_arg(req, 'Prefer', 'outlook.body-content-type') == 'text'
+    assert _header_args(Request(testing.create_environ()), 'Prefer') == {}
+
+
+def test_prefer_per_request():
+    first = Prefer(Request(testing.create_environ(headers={'Prefer': PREFER})))
+    second = Prefer(Request(testing.create_environ(headers={'Prefer': PREFER})))
+    assert first.get('outlook.timezone', raw=True) == 'Europe/Amsterdam'
+    first.update('outlook.timezone', 'parsed')
+    assert first.get('outlook.timezone') == 'parsed'
+    assert second.get('outlook.timezone') is None
+    assert second.get('outlook.timezone', raw=True) == 'Europe/Amsterdam'
+    assert Prefer(Request(testing.create_environ())).get('outlook.timezone', raw=True) is None
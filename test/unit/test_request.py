@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+import falcon
+import pytest
+from falcon import testing
+
+from grapi.api.v1.request import Request
+from grapi.api.v1.resource import HTTPBadRequest, Resource, _coalesce, _etag, _parse_qs
+
+
+def test_context_lazy():
+    req = Request(testing.create_environ(query_string='$top=5', headers={'Prefer': 'outlook.timezone="UTC"'}))
+    assert 'request_id' not in req.context
+    assert 'prefer' not in req.context
+    assert req.context.request_id == req.context.request_id
+    assert req.context.prefer.get('outlook.timezone', raw=True) == 'UTC'
+    with pytest.raises(AttributeError):
+        req.context.unknown
+
+
+def test_parse_qs_copy():
+    req = Request(testing.create_environ(query_string='$top=5&$orderby=subject'))
+    args = _parse_qs(req)
+    args['$orderby'][0] = 'changed'
+    del args['$top']
+    assert _parse_qs(req) == {'$top': ['5'], '$orderby': ['subject']}
+
+
+def test_parse_qs_invalid():
+    req = Request(testing.create_environ(query_string='$skip=-1'))
+    with pytest.raises(HTTPBadRequest):
+        _parse_qs(req)
+
+
+def test_respond_304():
+    resource = Resource({})
+    etag = _etag(Request(testing.create_environ()), 'abc.1')
+    assert etag == 'W/"abc.1"'
+
+    req = Request(testing.create_environ(headers={'If-None-Match': '"other", "abc.1"'}))
+    with pytest.raises(falcon.HTTPStatus):
+        resource.respond_304(req, falcon.Response(), etag)
+
+    req = Request(testing.create_environ(query_string='$top=5', headers={'If-None-Match': etag}))
+    resp = falcon.Response()
+    resource.respond_304(req, resp, _etag(req, 'abc.1'))
+    assert resp.get_header('ETag') != etag
+
+
+def test_coalesce():
+    chunks = [b'{"value":[', b'1', b',', b'2', b']}']
+    assert list(_coalesce(iter(chunks), size=4, interval=60)) == [b'{"value":[', b'1,2]}']
+    assert list(_coalesce(iter(chunks), size=0)) == chunks
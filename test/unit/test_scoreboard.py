@@ -0,0 +1,18 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+from grapi.mfr.scoreboard import Scoreboard
+
+
+def test_acquire_release():
+    board = Scoreboard(2)
+    first = board.acquire('rest', 0)
+    second = board.acquire('rest', 1)
+    assert {first, second} == {0, 1}
+    assert board[second].kind == b'rest'
+    assert board[second].n == 1
+
+    assert board.acquire('rest', 2) is None
+
+    board.release(first)
+    assert board.acquire('notify', 0) == first
+    assert board[first].kind == b'notify'
@@ -0,0 +1,90 @@
+"""Test backend/kopano/table module."""
+from unittest.mock import Mock
+
+from MAPI.Struct import SPropValue
+from MAPI.Tags import (PR_CHANGE_KEY, PR_CREATION_TIME, PR_ENTRYID, PR_IMPORTANCE, PR_MESSAGE_CLASS_W,
+                       PR_MESSAGE_FLAGS, PR_SUBJECT_W, PT_ERROR)
+from MAPI.Time import FileTime
+
+from grapi.backend.kopano.message import MessageResource
+from grapi.backend.kopano.table import (MESSAGE_COLUMNS, TableRow, _systime, bind_columns, table_columns,
+                                        table_items)
+
+UNIX_EPOCH = 116444736000000000  # In FILETIME units of 100ns.
+
+
+def filetime(seconds, units=0):
+    return FileTime(UNIX_EPOCH + seconds * 10000000 + units)
+
+
+def test_systime():
+    """Test formatting of PT_SYSTIME values like _date."""
+    assert _systime(filetime(1577836800)) == '2020-01-01T00:00:00Z'
+    assert _systime(filetime(1577836800, 50)) == '2020-01-01T00:00:00.000000Z'
+    assert _systime(None) is None
+    assert _systime(None, '0001-01-01T00:00:00Z') == '0001-01-01T00:00:00Z'
+
+
+def test_bind_columns():
+    """Test that only columns of fields with an accessor are bound."""
+    fields = {'subject': lambda item: item.subject, 'other': lambda item: None}
+    columns = bind_columns(fields, MESSAGE_COLUMNS)
+    assert set(columns) == {'subject'}
+    assert columns['subject'][2] is fields['subject']
+
+
+def test_table_columns():
+    """Test that the property tags of fields start with PR_ENTRYID."""
+    tags = table_columns(MESSAGE_COLUMNS, ['id', 'subject', 'changeKey', '@odata.etag', 'unknown'])
+    assert tags == [PR_ENTRYID, PR_SUBJECT_W, PR_CHANGE_KEY]
+
+
+def test_row_renderers():
+    """Test rendering of message fields from row columns."""
+    props = {
+        PR_ENTRYID: b'\x01\x02',
+        PR_CHANGE_KEY: b'\x03',
+        PR_MESSAGE_CLASS_W: 'IPM.Schedule.Meeting.Request',
+        PR_IMPORTANCE: 2,
+        PR_MESSAGE_FLAGS: 1,
+    }
+    row = TableRow(Mock(), 'parent', props, MESSAGE_COLUMNS)
+    render = {name: column[1] for name, column in MESSAGE_COLUMNS.items()}
+    assert render['id'](row) == 'AQI='
+    assert render['@odata.etag'](row) == 'W/"Aw=="'
+    assert render['@odata.type'](row) == '#microsoft.graph.eventMessage'
+    assert render['subject'](row) == ''
+    assert render['importance'](row) == 'High'
+    assert render['isRead'](row) is True
+    assert render['hasAttachments'](row) is False
+    assert render['parentFolderId'](row) == 'parent'
+    assert render['createdDateTime'](row) == '0001-01-01T00:00:00Z'
+    assert render['sentDateTime'](row) is None
+
+
+def test_row_fallback():
+    """Test that fields without column value are rendered from the item."""
+    folder = Mock()
+    folder.item.return_value = Mock(changekey='fromitem', subject='Subject')
+    resource = MessageResource({})
+    row = TableRow(folder, 'parent', {PR_ENTRYID: b'\x01', PR_SUBJECT_W: 'Row'}, MessageResource.columns)
+    data = resource.get_fields(None, row, ['id', 'subject', 'changeKey'], MessageResource.fields)
+    assert data == {'id': 'AQ==', 'subject': 'Row', 'changeKey': 'fromitem'}
+    folder.item.assert_called_once_with('AQ==')
+
+
+def test_table_items():
+    """Test that rows are fetched with one QueryRows and skip errors."""
+    folder = Mock(entryid='parent')
+    table = folder.mapiobj.GetContentsTable.return_value
+    table.QueryRows.return_value = [
+        [SPropValue(PR_ENTRYID, b'\x01'), SPropValue(PR_SUBJECT_W, 'first')],
+        [SPropValue(PR_ENTRYID, b'\x02'), SPropValue((PR_CREATION_TIME & 0xffff0000) | PT_ERROR, 0)],
+    ]
+    tags = [PR_ENTRYID, PR_SUBJECT_W, PR_CREATION_TIME]
+    rows = list(table_items(folder, MESSAGE_COLUMNS, tags, page_start=10, page_limit=2, order=('-received',)))
+    assert [row.props for row in rows] == [{PR_ENTRYID: b'\x01', PR_SUBJECT_W: 'first'}, {PR_ENTRYID: b'\x02'}]
+    assert rows[0].parent_id == 'parent'
+    table.SetColumns.assert_called_once()
+    table.SeekRow.assert_called_once()
+    table.QueryRows.assert_called_once_with(2, 0)
@@ -0,0 +1,23 @@
+# SPDX-License-Identifier: AGPL-3.0-or-later
+import pytest
+import pytz
+
+from grapi.api.v1.timezone import to_timezone
+
+
+def test_to_timezone():
+    assert to_timezone('W. Europe Standard Time') is pytz.timezone('Europe/Berlin')
+    assert to_timezone('Europe/Amsterdam') is pytz.timezone('Europe/Amsterdam')
+    assert to_timezone('UTC').utcoffset(None).total_seconds() == 0
+
+
+def test_to_timezone_cached():
+    to_timezone('Pacific Standard Time')
+    hits = to_timezone.cache_info().hits
+    to_timezone('Pacific Standard Time')
+    assert to_timezone.cache_info().hits == hits + 1
+
+
+def test_to_timezone_unknown():
+    with pytest.raises(pytz.UnknownTimeZoneError):
+        to_timezone('Unknown Standard Time')